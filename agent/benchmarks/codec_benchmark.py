@@ -0,0 +1,147 @@
+"""
+Микробенчмарк разбора запросов и кодирования ответов агента.
+
+Сравнивает прежний путь (before-валидатор модели, CheckResponseRMQ,
+model_dump и json.dumps) с netcheck_agent.codec и проверяет, что
+байты ответов совпадают.
+
+    uv run python benchmarks/codec_benchmark.py [-n 20000]
+"""
+
+import argparse
+import datetime
+import json
+import time
+import uuid
+
+from pydantic import model_validator
+
+from netcheck_agent.checks import HttpResult, HttpTimings, PingResult
+from netcheck_agent.codec import decode_message, encode_response
+from netcheck_agent.schemas import (
+    CheckRequest,
+    CheckRequestRMQ,
+    CheckResponse,
+    CheckResponseRMQ,
+)
+
+
+class LegacyCheckRequestRMQ(CheckRequestRMQ):
+    @model_validator(mode="before")
+    def legacy_ensure_scheme(cls, values):
+        host = values.get("host")
+        if host and not (host.startswith("http://") or host.startswith("https://")):
+            values["host"] = f"http://{host}"
+        return values
+
+
+def legacy_decode(data: bytes) -> CheckRequest:
+    return LegacyCheckRequestRMQ.model_validate_json(data)
+
+
+def legacy_encode(
+    response: CheckResponse, request_id: uuid.UUID, agent_id: uuid.UUID
+) -> bytes:
+    response_rmq = CheckResponseRMQ(
+        success=response.success,
+        request_id=request_id,
+        result=response.result,
+        error=response.error,
+        latency_ms=response.latency_ms,
+        timestamp=response.timestamp,
+        agent_id=agent_id,
+    )
+    return json.dumps(response_rmq.model_dump(mode="json")).encode()
+
+
+def sample_requests() -> list[bytes]:
+    return [
+        json.dumps(
+            {
+                "request_id": str(uuid.uuid4()),
+                "request_type": request_type,
+                "host": host,
+                "port": port,
+                "options": options,
+            }
+        ).encode()
+        for request_type, host, port, options in (
+            ("HTTP", "example.com", None, {}),
+            ("PING", "https://example.com", None, {"count": 5}),
+            ("TCP_CONNECT", "10.0.0.1", 443, {"ports": [22, 80, 443]}),
+        )
+    ]
+
+
+def sample_responses() -> list[CheckResponse]:
+    now = datetime.datetime.now(datetime.UTC)
+    return [
+        CheckResponse(
+            success=True,
+            latency_ms=42.17,
+            timestamp=now,
+            result=HttpResult(
+                status_code=200,
+                headers={"Content-Type": "text/html", "Server": "nginx"},
+                redirected=False,
+                final_url="https://example.com/",
+                content_length=1256,
+                content_sample="<!doctype html>Привет",
+                timings=HttpTimings(dns_ms=1.2, connect_ms=10.5, ttfb_ms=30.1),
+            ),
+        ),
+        CheckResponse(
+            success=True,
+            latency_ms=3.0,
+            timestamp=now.replace(microsecond=0),
+            result=PingResult(latency_ms=1.5, sent=5, received=5, packet_loss=0.0),
+        ),
+        CheckResponse(success=False, error="Ошибка: timeout", timestamp=now),
+    ]
+
+
+def run(name: str, func, items: list, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        func(items[i % len(items)])
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed
+    print(f"{name:<28} {rate:>12,.0f} msg/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=20000)
+    args = parser.parse_args()
+
+    requests = sample_requests()
+    responses = sample_responses()
+    request_id, agent_id = uuid.uuid4(), uuid.uuid4()
+
+    for data in requests:
+        assert decode_message(data).model_dump() == legacy_decode(data).model_dump()
+    for response in responses:
+        assert encode_response(response, request_id, agent_id) == legacy_encode(
+            response, request_id, agent_id
+        )
+    print("fast path output is identical to the legacy path\n")
+
+    def legacy_round_trip(pair):
+        data, response = pair
+        request = legacy_decode(data)
+        return legacy_encode(response, request.request_id, agent_id)
+
+    def fast_round_trip(pair):
+        data, response = pair
+        request = decode_message(data)
+        return encode_response(response, request.request_id, agent_id)
+
+    pairs = [(data, response) for data in requests for response in responses]
+    before = run("decode+encode (legacy)", legacy_round_trip, pairs, args.n)
+    after = run("decode+encode (fast path)", fast_round_trip, pairs, args.n)
+    print(f"\nspeedup: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Сравнение пропускной способности проверок на asyncio и uvloop.
+
+Для каждого варианта event loop запускается отдельный процесс с
+локальными HTTP и TCP целями, через которые прогоняются HttpChecker и
+TcpChecker с заданной параллельностью, и PingChecker до 127.0.0.1.
+
+    uv run python benchmarks/event_loop_benchmark.py [-n 5000] [-c 100]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+
+async def _serve_tcp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    writer.close()
+
+
+async def _bench(n: int, concurrency: int) -> dict[str, float]:
+    from aiohttp import web
+
+    from netcheck_agent.checks import HttpChecker, PingChecker, TcpChecker
+    from netcheck_agent.schemas import CheckRequest
+
+    app = web.Application()
+    app.router.add_get("/", lambda request: web.Response(text="ok"))
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    http_port = site._server.sockets[0].getsockname()[1]
+    tcp_server = await asyncio.start_server(_serve_tcp, "127.0.0.1", 0)
+    tcp_port = tcp_server.sockets[0].getsockname()[1]
+
+    targets = {
+        "HTTP": (
+            HttpChecker(),
+            CheckRequest(
+                request_type="HTTP", host=f"http://127.0.0.1:{http_port}/", port=None
+            ),
+        ),
+        "TCP_CONNECT": (
+            TcpChecker(),
+            CheckRequest(request_type="TCP_CONNECT", host="127.0.0.1", port=tcp_port),
+        ),
+        "PING": (
+            PingChecker(),
+            CheckRequest(request_type="PING", host="127.0.0.1", port=None),
+        ),
+    }
+    for checker, _ in targets.values():
+        await checker.start()
+    results = {}
+    for name, (checker, request) in targets.items():
+        semaphore = asyncio.Semaphore(concurrency)
+        failed = 0
+
+        async def one():
+            nonlocal failed
+            async with semaphore:
+                response = await checker.check(request)
+                failed += not response.success
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        results[name] = n / (time.perf_counter() - started)
+        if failed:
+            print(f"  {name}: {failed} checks failed")
+
+    for checker, _ in targets.values():
+        await checker.close()
+    tcp_server.close()
+    await runner.cleanup()
+    return results
+
+
+def _run(use_uvloop: bool, n: int, concurrency: int, queue) -> None:
+    os.environ["USE_UVLOOP"] = str(use_uvloop)
+    from netcheck_agent import event_loop
+
+    factory = event_loop.get_loop_factory()
+    loop_name = "uvloop" if factory is not None else "asyncio"
+    queue.put((loop_name, event_loop.run(_bench(n, concurrency))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=5000, help="checks per type")
+    parser.add_argument("-c", type=int, default=100, help="concurrency")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    rates = {}
+    for use_uvloop in (False, True):
+        process = context.Process(target=_run, args=(use_uvloop, args.n, args.c, queue))
+        process.start()
+        loop_name, results = queue.get()
+        process.join()
+        rates[loop_name] = results
+        for name, rate in results.items():
+            print(f"{loop_name:<8} {name:<12} {rate:>10,.0f} checks/s")
+
+    if "uvloop" not in rates:
+        print("\nuvloop is not installed, only asyncio was measured")
+        return
+    print()
+    for name, rate in rates["uvloop"].items():
+        print(f"{name:<12} uvloop speedup: x{rate / rates['asyncio'][name]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
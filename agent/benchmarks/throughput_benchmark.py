@@ -0,0 +1,263 @@
+"""
+Пропускная способность агента на локальных целях.
+
+Для каждого типа проверки запускается отдельный процесс со своими
+целями: HTTP сервер с заданной задержкой и размером тела, TCP listener
+и заглушка DNS сервера на 127.0.0.1. Запросы с заданной частотой
+кладутся в очередь, которую, как и ConsumeService, разбирают воркеры
+через requests_handler.callback, а ответы собирает фейковый producer.
+Сеть не нужна, поэтому бенчмарк можно запускать в CI.
+
+Накладные расходы агента - время от постановки запроса в очередь до
+публикации ответа за вычетом latency_ms самой проверки. RSS - пик
+памяти процесса вместе с локальными целями.
+
+    uv run python benchmarks/throughput_benchmark.py [-r 500] [-d 5] [-w 100]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import struct
+import sys
+import time
+import uuid
+from typing import Callable
+
+CHECK_TYPES = ("HTTP", "TCP_CONNECT", "DNS")
+# бенчмарку не нужны регистрация и RabbitMQ, но без них не создать Config
+DEFAULT_ENV = {
+    "LOG_LEVEL": "WARNING",
+    "REGISTRATION_TOKEN": "00000000-0000-0000-0000-000000000000",
+    "REGISTRATION_URL": "http://127.0.0.1/",
+    "REGION": "benchmark",
+    "GET_IP_API_URL": "http://127.0.0.1/",
+    "NUM_WORKERS": "100",
+}
+DNS_TTL = 60
+
+
+class _StubDns(asyncio.DatagramProtocol):
+    """Отвечает 127.0.0.1 на A запросы и пустым ответом на остальные."""
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        end = 12
+        while data[end]:
+            end += data[end] + 1
+        (qtype,) = struct.unpack(">H", data[end + 1 : end + 3])
+        question = data[12 : end + 5]
+        answer = b""
+        if qtype == 1:
+            answer = struct.pack(">HHHIH", 0xC00C, 1, 1, DNS_TTL, 4) + bytes(
+                [127, 0, 0, 1]
+            )
+        header = data[:2] + struct.pack(">HHHHH", 0x8180, 1, int(bool(answer)), 0, 0)
+        self.transport.sendto(header + question + answer, addr)
+
+
+async def _serve_tcp(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    writer.close()
+
+
+async def _start_targets(args) -> tuple[dict[str, tuple[str, int | None]], Callable]:
+    """:return: хост и порт целей по типам проверок и функция их остановки"""
+    from aiohttp import web
+
+    body = b"x" * args.http_body
+
+    async def handle(request: web.Request) -> web.Response:
+        if args.http_latency:
+            await asyncio.sleep(args.http_latency / 1000)
+        return web.Response(body=body)
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    http_port = site._server.sockets[0].getsockname()[1]
+
+    tcp_server = await asyncio.start_server(_serve_tcp, "127.0.0.1", 0)
+    tcp_port = tcp_server.sockets[0].getsockname()[1]
+
+    loop = asyncio.get_running_loop()
+    dns_transport, _ = await loop.create_datagram_endpoint(
+        _StubDns, local_addr=("127.0.0.1", 0)
+    )
+    dns_port = dns_transport.get_extra_info("sockname")[1]
+    # резолверы агента создаются позже и читают адрес из конфига
+    os.environ["DNS_NAMESERVERS"] = json.dumps([f"127.0.0.1:{dns_port}"])
+
+    targets = {
+        "HTTP": (f"http://127.0.0.1:{http_port}/", None),
+        "TCP_CONNECT": ("127.0.0.1", tcp_port),
+        "DNS": ("benchmark.test", None),
+    }
+
+    async def stop() -> None:
+        dns_transport.close()
+        tcp_server.close()
+        await runner.cleanup()
+
+    return targets, stop
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _bench(check_type: str, args) -> dict:
+    targets, stop_targets = await _start_targets(args)
+
+    from netcheck_agent.checks import get_checker_registry
+    from netcheck_agent.requests_handler import callback
+
+    await get_checker_registry().start()
+
+    host, port = targets[check_type]
+    # DNS мимо кеша, иначе меряется только кеш агента
+    options = {"bypass_dns_cache": True} if check_type == "DNS" else {}
+    agent_id = uuid.uuid4()
+    queue: asyncio.Queue = asyncio.Queue()
+    enqueued: dict[str, float] = {}
+    published: list[tuple[float, bytes]] = []
+    total = int(args.rate * args.duration)
+    done = asyncio.Event()
+
+    async def publish(body: bytes) -> None:
+        published.append((time.perf_counter(), body))
+        if len(published) >= total:
+            done.set()
+
+    async def consume() -> None:
+        while True:
+            data = await queue.get()
+            try:
+                await callback(publish, agent_id, data)
+            except Exception as e:
+                print(f"  callback failed: {e!r}", file=sys.stderr)
+
+    async def produce() -> None:
+        started = time.perf_counter()
+        for i in range(total):
+            delay = started + i / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            request_id = str(uuid.uuid4())
+            data = json.dumps(
+                {
+                    "request_id": request_id,
+                    "request_type": check_type,
+                    "host": host,
+                    "port": port,
+                    "options": options,
+                }
+            ).encode()
+            enqueued[request_id] = time.perf_counter()
+            queue.put_nowait(data)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers = [asyncio.create_task(consume()) for _ in range(args.workers)]
+    started = time.perf_counter()
+    await produce()
+    try:
+        await asyncio.wait_for(done.wait(), args.duration + args.drain_timeout)
+    except TimeoutError:
+        print(f"  {check_type}: {total - len(published)} responses missing")
+    elapsed = (published[-1][0] if published else time.perf_counter()) - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await get_checker_registry().close()
+    await stop_targets()
+
+    overheads, failed = [], 0
+    for published_at, body in published:
+        response = json.loads(body)
+        if not response["success"]:
+            failed += 1
+            continue
+        e2e = published_at - enqueued[response["request_id"]]
+        overheads.append(e2e - (response["latency_ms"] or 0) / 1000)
+    return {
+        "checks": len(published),
+        "failed": failed,
+        "checks_per_sec": len(published) / elapsed if elapsed > 0 else 0.0,
+        "overhead_p50_ms": _percentile(overheads, 0.5) * 1000,
+        "overhead_p99_ms": _percentile(overheads, 0.99) * 1000,
+        # ru_maxrss в Linux в килобайтах
+        "rss_mib": rss_after / 1024,
+        "rss_growth_mib": (rss_after - rss_before) / 1024,
+    }
+
+
+def _run(check_type: str, args, queue) -> None:
+    for name, value in DEFAULT_ENV.items():
+        os.environ.setdefault(name, value)
+    from netcheck_agent import event_loop
+
+    try:
+        result = event_loop.run(_bench(check_type, args))
+    except BaseException as e:
+        queue.put((check_type, {"error": repr(e)}))
+        raise
+    queue.put((check_type, result))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--rate", type=float, default=500, help="checks/s")
+    parser.add_argument("-d", "--duration", type=float, default=5, help="seconds")
+    parser.add_argument("-w", "--workers", type=int, default=100, help="consumers")
+    parser.add_argument(
+        "-t", "--types", default=",".join(CHECK_TYPES), help="check types"
+    )
+    parser.add_argument("--http-latency", type=float, default=0, help="ms")
+    parser.add_argument("--http-body", type=int, default=1024, help="bytes")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="seconds")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    results = {}
+    print(
+        f"{'type':<12} {'checks':>7} {'failed':>7} {'checks/s':>10} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'RSS MiB':>8}"
+    )
+    for check_type in args.types.split(","):
+        process = context.Process(target=_run, args=(check_type, args, queue))
+        process.start()
+        name, result = queue.get()
+        process.join()
+        results[name] = result
+        if "error" in result:
+            print(f"{name:<12} failed: {result['error']}")
+            continue
+        print(
+            f"{name:<12} {result['checks']:>7} {result['failed']:>7} "
+            f"{result['checks_per_sec']:>10,.0f} {result['overhead_p50_ms']:>8.2f} "
+            f"{result['overhead_p99_ms']:>8.2f} {result['rss_mib']:>8.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if any(result.get("failed", 1) for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
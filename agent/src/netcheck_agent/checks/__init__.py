@@ -2,17 +2,35 @@ from .base_checker import BaseChecker
 from .dns_checker import DnsChecker
 from .http_checker import HttpChecker
 from .ping_checker import PingChecker
-from .schemas import DnsResult, HttpResult, PingResult, TcpResult
+from .registry import CheckerRegistry, get_checker_registry
+from .schemas import (
+    DnsResult,
+    HttpResult,
+    HttpTimings,
+    PingResult,
+    TcpResult,
+    TracerouteResult,
+    UdpResult,
+)
 from .tcp_checker import TcpChecker
+from .traceroute_checker import TracerouteChecker
+from .udp_checker import UdpChecker
 
 __all__ = [
     "BaseChecker",
+    "CheckerRegistry",
     "HttpChecker",
     "HttpResult",
+    "HttpTimings",
     "DnsChecker",
     "DnsResult",
     "PingChecker",
     "PingResult",
     "TcpChecker",
     "TcpResult",
+    "TracerouteChecker",
+    "TracerouteResult",
+    "UdpChecker",
+    "UdpResult",
+    "get_checker_registry",
 ]
@@ -1,11 +1,51 @@
 import time
 from abc import ABC, abstractmethod
-from typing import Awaitable
+from collections import Counter
+from typing import Any, Awaitable, Callable
 
 from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
 
+# сколько запущенных проверок пользуется каждым общим движком
+_engine_users: Counter = Counter()
+
 
 class BaseChecker(ABC):
+    """
+    Проверка одного типа запросов.
+
+    Экземпляр создается один раз на весь агент, поэтому может держать
+    прогретые ресурсы: они создаются в `start` и освобождаются в `close`.
+    Общие движки из `engines` запускает первая проверка, которой они
+    нужны, а останавливает последняя закрытая.
+    """
+
+    # фабрики движков в порядке запуска, останавливаются в обратном
+    engines: tuple[Callable[[], Any], ...] = ()
+
+    def __init__(self) -> None:
+        # движки, запущенные этим экземпляром в start
+        self._started_engines: list = []
+
+    async def start(self) -> None:
+        try:
+            for get_engine in self.engines:
+                engine = get_engine()
+                if engine in self._started_engines:
+                    continue
+                await engine.start()
+                _engine_users[engine] += 1
+                self._started_engines.append(engine)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        engines, self._started_engines = self._started_engines, []
+        for engine in reversed(engines):
+            if _engine_users[engine] > 1:
+                _engine_users[engine] -= 1
+            elif _engine_users.pop(engine, 0):
+                await engine.close()
 
     @abstractmethod
     async def check(self, request: CheckRequest) -> CheckResponse: ...
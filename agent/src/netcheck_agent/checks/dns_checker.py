@@ -1,64 +1,77 @@
+import asyncio
 import datetime
 from urllib.parse import urlparse
 
 import aiodns
 
+from netcheck_agent.engines import get_dns_cache, get_dns_pool
 from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
 
 from .base_checker import BaseChecker
-from .schemas import DnsResult
+from .schemas import DnsOptions, DnsResult
+
+RECORD_FIELDS = {
+    "A": "a_records",
+    "AAAA": "aaaa_records",
+    "MX": "mx_records",
+    "NS": "ns_records",
+    "TXT": "txt_records",
+}
+
+
+def _format_record(record_type: str, record) -> str:
+    if record_type == "MX":
+        return f"{record.host} (priority {record.priority})"
+    if record_type == "TXT":
+        return str(record.text)
+    return str(record.host)
 
 
 class DnsChecker(BaseChecker):
+    engines = (get_dns_pool,)
 
-    async def _resolve(self, request: CheckRequest) -> CheckResponseBase:
-        resolver = aiodns.DNSResolver(timeout=5)
+    async def _query(
+        self, domain: str, record_type: str, bypass_cache: bool
+    ) -> tuple[list[str], aiodns.error.DNSError | None]:
+        try:
+            records = await get_dns_cache().query(
+                domain, record_type, bypass=bypass_cache
+            )
+        except aiodns.error.DNSError as e:
+            return [], e
+        return [_format_record(record_type, r) for r in records], None
 
+    async def _resolve(self, request: CheckRequest) -> CheckResponseBase:
+        options = DnsOptions.model_validate(request.options)
         parsed = urlparse(request.host)
         domain = parsed.hostname or request.host
 
         result = DnsResult()
 
         try:
-            # A-записи
-            try:
-                a_records = await resolver.query(domain, "A")
-                result.a_records = [str(r.host) for r in a_records]
-            except aiodns.error.DNSError:
-                result.a_records = []
-
-            # AAAA-записи
-            try:
-                aaaa_records = await resolver.query(domain, "AAAA")
-                result.aaaa_records = [str(r.host) for r in aaaa_records]
-            except aiodns.error.DNSError:
-                result.aaaa_records = []
-
-            # MX-записи
-            try:
-                mx_records = await resolver.query(domain, "MX")
-                result.mx_records = [
-                    f"{r.host} (priority {r.priority})" for r in mx_records
-                ]
-
-            except aiodns.error.DNSError:
-                result.mx_records = []
-
-            # NS-записи
-            try:
-                ns_records = await resolver.query(domain, "NS")
-                result.ns_records = [str(r.host) for r in ns_records]
-            except aiodns.error.DNSError:
-                result.ns_records = []
-
-            # TXT-записи
-            try:
-                txt_records = await resolver.query(domain, "TXT")
-                result.txt_records = ["".join(str(r.text)) for r in txt_records]
-            except aiodns.error.DNSError:
-                result.txt_records = []
-
-            return CheckResponseBase(success=True, result=result)
+            # все типы записей запрашиваются параллельно,
+            # ошибка одного типа не влияет на остальные
+            answers = await asyncio.gather(
+                *(
+                    self._query(domain, record_type, options.bypass_dns_cache)
+                    for record_type in RECORD_FIELDS
+                )
+            )
+
+            errors = {}
+            for (record_type, field), (records, error) in zip(
+                RECORD_FIELDS.items(), answers
+            ):
+                setattr(result, field, records)
+                if error is not None:
+                    errors[record_type] = str(error)
+            result.record_errors = errors or None
+
+            timed_out = all(
+                error is not None and error.args[0] == aiodns.error.ARES_ETIMEOUT
+                for _, error in answers
+            )
+            return CheckResponseBase(success=True, timed_out=timed_out, result=result)
 
         except Exception as e:
             result.error = str(e)
@@ -71,6 +84,7 @@ class DnsChecker(BaseChecker):
                 success=result.success,
                 latency_ms=latency,
                 result=result.result,
+                timed_out=result.timed_out,
                 timestamp=datetime.datetime.now(datetime.UTC),
             )
         except Exception as e:
@@ -1,51 +1,109 @@
+import asyncio
 import datetime
 
 import aiohttp
 
+from netcheck_agent.config import get_config
+from netcheck_agent.engines import (
+    HttpPhaseTimer,
+    dns_cache_bypass,
+    get_dns_pool,
+    get_http_engine,
+)
 from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
 
 from .base_checker import BaseChecker
-from .schemas import HttpResult
+from .schemas import HttpOptions, HttpResult, HttpTimings
+
+CHUNK_SIZE = 64 * 1024
+SAMPLE_CHARS = 200
 
 
 class HttpChecker(BaseChecker):
+    engines = (get_dns_pool, get_http_engine)
+
+    async def _read_body(
+        self, resp: aiohttp.ClientResponse, max_bytes: int
+    ) -> tuple[int, str, bool]:
+        """
+        Читает тело ответа потоково, не держа его в памяти целиком.
+
+        :return: (число прочитанных байт тела после распаковки, начало тела,
+            тело прочитано не полностью)
+        """
+        sample = ""
+        received = 0
+        truncated = False
+
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            if not received:
+                sample = self._decode_sample(chunk, resp.charset)
+            received += len(chunk)
+            if received >= max_bytes:
+                truncated = not resp.content.at_eof()
+                break
+
+        return received, sample, truncated
+
+    @staticmethod
+    def _decode_sample(chunk: bytes, charset: str | None) -> str:
+        data = chunk[: SAMPLE_CHARS * 4]
+        try:
+            sample = data.decode(charset or "utf-8", errors="ignore")
+        except LookupError:
+            # неизвестная кодировка в Content-Type
+            sample = data.decode("utf-8", errors="ignore")
+        return sample[:SAMPLE_CHARS]
 
     async def _make_request(self, request: CheckRequest) -> CheckResponseBase:
+        options = HttpOptions.model_validate(request.options)
         timeout = aiohttp.ClientTimeout(total=5)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(request.host, timeout=timeout) as resp:
-                content = await resp.text(errors="ignore")
-                headers = dict(resp.headers)
-
-                ssl_expiry_days = None
-                if (
-                    resp.url.scheme == "https"
-                    and resp.connection
-                    and resp.connection.transport
-                ):
-                    ssl_obj = resp.connection.transport.get_extra_info("ssl_object")
-                    if ssl_obj:
-                        cert = ssl_obj.getpeercert()
-                        if "notAfter" in cert:
-                            expire_date = datetime.datetime.strptime(
-                                cert["notAfter"], "%b %d %H:%M:%S %Y %Z"
-                            )
-                            ssl_expiry_days = (
-                                expire_date - datetime.datetime.utcnow()
-                            ).days
-
-                return CheckResponseBase(
-                    success=True,
-                    result=HttpResult(
-                        status_code=resp.status,
-                        headers=headers,
-                        redirected=str(resp.url) != request.host,
-                        final_url=str(resp.url),
-                        content_length=len(content),
-                        content_sample=content[:200],
-                        ssl_expiry_days=ssl_expiry_days,
-                    ),
-                )
+        session = get_http_engine().session(cold=options.cold_connection)
+        timer = HttpPhaseTimer()
+        bypass_dns_cache = options.bypass_dns_cache or options.cold_connection
+        with timer, dns_cache_bypass(bypass_dns_cache):
+            resp = await session.get(
+                request.host, timeout=timeout, trace_request_ctx=timer
+            )
+        async with resp:
+            content_length, content_sample, truncated = await self._read_body(
+                resp, options.max_body_bytes or get_config().HTTP_MAX_BODY_BYTES
+            )
+            timer.body_end()
+            headers = dict(resp.headers)
+
+            ssl_expiry_days = None
+            if (
+                resp.url.scheme == "https"
+                and resp.connection
+                and resp.connection.transport
+            ):
+                ssl_obj = resp.connection.transport.get_extra_info("ssl_object")
+                if ssl_obj:
+                    cert = ssl_obj.getpeercert()
+                    if "notAfter" in cert:
+                        expire_date = datetime.datetime.strptime(
+                            cert["notAfter"], "%b %d %H:%M:%S %Y %Z"
+                        )
+                        ssl_expiry_days = (
+                            expire_date - datetime.datetime.utcnow()
+                        ).days
+
+            return CheckResponseBase(
+                success=True,
+                result=HttpResult(
+                    status_code=resp.status,
+                    headers=headers,
+                    redirected=str(resp.url) != request.host,
+                    final_url=str(resp.url),
+                    content_length=content_length,
+                    content_length_header=resp.content_length,
+                    content_sample=content_sample,
+                    body_truncated=truncated,
+                    ssl_expiry_days=ssl_expiry_days,
+                    timings=HttpTimings.model_validate(timer.as_ms()),
+                ),
+            )
 
     async def check(self, request: CheckRequest) -> CheckResponse:
         try:
@@ -54,9 +112,17 @@ class HttpChecker(BaseChecker):
                 success=result.success,
                 latency_ms=latency,
                 result=result.result,
+                timed_out=result.timed_out,
                 timestamp=datetime.datetime.now(datetime.UTC),
             )
 
+        except asyncio.TimeoutError:
+            return CheckResponse(
+                success=False,
+                error="Request timeout",
+                timed_out=True,
+                timestamp=datetime.datetime.now(datetime.UTC),
+            )
         except Exception as e:
             return CheckResponse(
                 success=False,
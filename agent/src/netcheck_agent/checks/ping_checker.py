@@ -1,23 +1,110 @@
+import asyncio
 import datetime
 from urllib.parse import urlparse
 
-import aioping
-
+from netcheck_agent.engines import (
+    IcmpReply,
+    get_dns_cache,
+    get_dns_pool,
+    get_icmp_engine,
+)
 from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
 
 from .base_checker import BaseChecker
-from .schemas import PingResult
+from .schemas import PingOptions, PingResult
+from .stats import RttStats
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
 
 
 class PingChecker(BaseChecker):
+    engines = (get_dns_pool, get_icmp_engine)
+
+    async def _probe_train(
+        self, address: str, family: int, options: PingOptions, stats: RttStats
+    ) -> tuple[str | None, bool]:
+        """
+        Отправляет серию эхо-запросов с заданным интервалом в одной корутине.
+
+        Статистика обновляется колбэками по мере прихода ответов.
+
+        :return: текст последней ошибки, если она была, и истек ли таймаут
+            хотя бы одного запроса
+        """
+        engine = get_icmp_engine()
+        loop = asyncio.get_running_loop()
+        errors: list[str] = []
+        timeouts = 0
+
+        def _on_reply(future: asyncio.Future[IcmpReply]) -> None:
+            nonlocal timeouts
+            if future.cancelled():
+                return
+            error = future.exception()
+            if isinstance(error, TimeoutError):
+                timeouts += 1
+            if error is not None:
+                errors[:] = [str(error)]
+                return
+            reply = future.result()
+            if reply.kind == "echo":
+                stats.add(reply.rtt * 1000)
+            else:
+                errors[:] = [f"ICMP {reply.kind} from {reply.address}"]
+
+        pending: list[asyncio.Future[IcmpReply]] = []
+        started = loop.time()
+        for i in range(options.count):
+            delay = started + i * options.interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                future = await engine.send(address, family, timeout=options.timeout)
+            except OSError as e:
+                stats.add_sent()
+                errors[:] = [str(e)]
+                continue
+            stats.add_sent()
+            future.add_done_callback(_on_reply)
+            pending.append(future)
+            pending = [f for f in pending if not f.done()]
+
+        if pending:
+            await asyncio.wait(pending)
+        return (errors[0] if errors else None), timeouts > 0
 
     async def _ping(self, request: CheckRequest) -> CheckResponseBase:
         try:
+            options = PingOptions.model_validate(request.options)
             parsed = urlparse(request.host)
             host = parsed.hostname or request.host
-            latency = await aioping.ping(host, timeout=2) * 1000
+            addresses = await get_dns_cache().resolve_addresses(
+                host, bypass=options.bypass_dns_cache
+            )
+            family, address = addresses[0]
+
+            stats = RttStats()
+            error, timed_out = await self._probe_train(address, family, options, stats)
             return CheckResponseBase(
-                success=True, result=PingResult(latency_ms=latency)
+                success=stats.received > 0,
+                # ни на один запрос не ответили вовремя
+                timed_out=timed_out and not stats.received,
+                result=PingResult(
+                    latency_ms=_round(stats.avg),
+                    sent=stats.sent,
+                    received=stats.received,
+                    packet_loss=_round(stats.packet_loss),
+                    min_ms=_round(stats.min),
+                    avg_ms=_round(stats.avg),
+                    max_ms=_round(stats.max),
+                    stddev_ms=_round(stats.stddev),
+                    p50_ms=_round(stats.p50),
+                    p95_ms=_round(stats.p95),
+                    jitter_ms=_round(stats.jitter),
+                    error=error if not stats.received else None,
+                ),
             )
         except Exception as e:
             return CheckResponseBase(success=False, result=PingResult(error=str(e)))
@@ -29,6 +116,7 @@ class PingChecker(BaseChecker):
                 success=result.success,
                 latency_ms=latency,
                 result=result.result,
+                timed_out=result.timed_out,
                 timestamp=datetime.datetime.now(datetime.UTC),
             )
         except Exception as e:
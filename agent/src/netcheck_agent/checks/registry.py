@@ -0,0 +1,78 @@
+from logging import getLogger
+
+from netcheck_agent.schemas import RequestType
+
+from .base_checker import BaseChecker
+from .dns_checker import DnsChecker
+from .http_checker import HttpChecker
+from .ping_checker import PingChecker
+from .tcp_checker import TcpChecker
+from .traceroute_checker import TracerouteChecker
+from .udp_checker import UdpChecker
+
+logger = getLogger(__name__)
+
+DEFAULT_CHECKERS: dict[RequestType, type[BaseChecker]] = {
+    RequestType.HTTP: HttpChecker,
+    RequestType.DNS: DnsChecker,
+    RequestType.PING: PingChecker,
+    RequestType.TCP_CONNECT: TcpChecker,
+    RequestType.UDP_CONNECT: UdpChecker,
+    RequestType.TRACEROUTE: TracerouteChecker,
+}
+
+
+class CheckerRegistry:
+    """
+    Экземпляры проверок агента по типам запросов.
+
+    Проверки создаются один раз и живут от `start` до `close`, так что
+    обработка сообщения сводится к поиску в словаре и вызову `check`.
+    """
+
+    def __init__(self, checker_types: dict[RequestType, type[BaseChecker]]) -> None:
+        self.checker_types = checker_types
+        self._checkers: dict[RequestType, BaseChecker] = {}
+
+    @property
+    def started(self) -> bool:
+        return bool(self._checkers)
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        checkers = {}
+        try:
+            for request_type, checker_type in self.checker_types.items():
+                checker = checker_type()
+                await checker.start()
+                checkers[request_type] = checker
+        except BaseException:
+            await self._close_all(checkers)
+            raise
+        self._checkers = checkers
+
+    def get(self, request_type: RequestType) -> BaseChecker | None:
+        return self._checkers.get(request_type)
+
+    async def close(self) -> None:
+        checkers, self._checkers = self._checkers, {}
+        await self._close_all(checkers)
+
+    @staticmethod
+    async def _close_all(checkers: dict[RequestType, BaseChecker]) -> None:
+        for request_type, checker in checkers.items():
+            try:
+                await checker.close()
+            except Exception:
+                logger.exception(f"Failed to close {request_type.value} checker")
+
+
+_checker_registry_instance: CheckerRegistry | None = None
+
+
+def get_checker_registry() -> CheckerRegistry:
+    global _checker_registry_instance
+    if _checker_registry_instance is None:
+        _checker_registry_instance = CheckerRegistry(DEFAULT_CHECKERS)
+    return _checker_registry_instance
@@ -1,4 +1,26 @@
-from pydantic import BaseModel
+from enum import Enum
+
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
+
+MAX_SCAN_PORTS = 1024
+
+
+class CheckOptions(BaseModel):
+    bypass_dns_cache: bool = False
+
+
+class HttpOptions(CheckOptions):
+    cold_connection: bool = False
+    max_body_bytes: int | None = Field(default=None, gt=0)
+
+
+class HttpTimings(BaseModel):
+    dns_ms: float | None = None
+    connect_ms: float | None = None
+    tls_ms: float | None = None
+    ttfb_ms: float | None = None
+    body_ms: float | None = None
+    reused_connection: bool = False
 
 
 class HttpResult(BaseModel):
@@ -6,9 +28,18 @@ class HttpResult(BaseModel):
     headers: dict[str, str] | None = None
     redirected: bool | None = None
     final_url: str | None = None
+    # прочитано байт тела после распаковки, при body_truncated - не все тело
     content_length: int | None = None
+    # значение заголовка Content-Length, при сжатии - размер сжатого тела
+    content_length_header: int | None = None
     content_sample: str | None = None
+    body_truncated: bool | None = None
     ssl_expiry_days: int | None = None
+    timings: HttpTimings | None = None
+
+
+class DnsOptions(CheckOptions):
+    bypass_dns_cache: bool = True
 
 
 class DnsResult(BaseModel):
@@ -17,14 +48,128 @@ class DnsResult(BaseModel):
     mx_records: list[str] | None = None
     ns_records: list[str] | None = None
     txt_records: list[str] | None = None
+    record_errors: dict[str, str] | None = None
     error: str | None = None
 
 
+class PingOptions(CheckOptions):
+    count: int = Field(default=1, ge=1, le=100)
+    interval: float = Field(default=1.0, ge=0.01, le=60)
+    timeout: float = Field(default=2.0, gt=0, le=30)
+
+
 class PingResult(BaseModel):
     latency_ms: float | None = None
+    sent: int | None = None
+    received: int | None = None
+    packet_loss: float | None = None
+    min_ms: float | None = None
+    avg_ms: float | None = None
+    max_ms: float | None = None
+    stddev_ms: float | None = None
+    p50_ms: float | None = None
+    p95_ms: float | None = None
+    jitter_ms: float | None = None
     error: str | None = None
 
 
+class TcpOptions(CheckOptions):
+    ports: list[int] = Field(default_factory=list, max_length=MAX_SCAN_PORTS)
+    port_range: tuple[int, int] | None = None
+    concurrency: int = Field(default=50, ge=1, le=500)
+    connect_timeout: float = Field(default=5.0, gt=0, le=30)
+
+    _scan_ports: list[int] = PrivateAttr(default_factory=list)
+
+    @field_validator("ports")
+    @classmethod
+    def check_ports(cls, ports: list[int]) -> list[int]:
+        if any(not 0 < port < 65536 for port in ports):
+            raise ValueError("ports must be in range 1-65535")
+        return ports
+
+    @field_validator("port_range")
+    @classmethod
+    def check_port_range(
+        cls, port_range: tuple[int, int] | None
+    ) -> tuple[int, int] | None:
+        # проверяется до разворачивания диапазона в список портов
+        if port_range is None:
+            return None
+        start, end = port_range
+        if not 1 <= start <= end <= 65535:
+            raise ValueError(
+                "port_range must be (start, end) with 1 <= start <= end <= 65535"
+            )
+        if end - start + 1 > MAX_SCAN_PORTS:
+            raise ValueError(f"no more than {MAX_SCAN_PORTS} ports per request")
+        return port_range
+
+    @model_validator(mode="after")
+    def build_scan_ports(self):
+        ports = set(self.ports)
+        if self.port_range is not None:
+            start, end = self.port_range
+            ports.update(range(start, end + 1))
+        if len(ports) > MAX_SCAN_PORTS:
+            raise ValueError(f"no more than {MAX_SCAN_PORTS} ports per request")
+        self._scan_ports = sorted(ports)
+        return self
+
+    @property
+    def scan_ports(self) -> list[int]:
+        return self._scan_ports
+
+
+class TcpPortResult(BaseModel):
+    state: str
+    latency_ms: float | None = None
+
+
 class TcpResult(BaseModel):
     success_connect: bool | None = None
+    ports: dict[int, TcpPortResult] | None = None
+    open_ports: list[int] | None = None
+    error: str | None = None
+
+
+class UdpProbe(str, Enum):
+    DNS = "dns"
+    NTP = "ntp"
+
+
+class UdpOptions(CheckOptions):
+    probe: UdpProbe | None = None
+    payload_hex: str | None = None
+    expect_hex: str | None = None
+    timeout: float = Field(default=2.0, gt=0, le=30)
+
+
+class UdpResult(BaseModel):
+    state: str | None = None
+    rtt_ms: float | None = None
+    response_size: int | None = None
+    response_valid: bool | None = None
+    error: str | None = None
+
+
+class TracerouteOptions(CheckOptions):
+    max_hops: int = Field(default=30, ge=1, le=64)
+    probes: int = Field(default=3, ge=1, le=10)
+    timeout: float = Field(default=2.0, gt=0, le=30)
+
+
+class TracerouteHop(BaseModel):
+    ttl: int
+    address: str | None = None
+    loss: float
+    min_ms: float | None = None
+    avg_ms: float | None = None
+    max_ms: float | None = None
+
+
+class TracerouteResult(BaseModel):
+    destination: str | None = None
+    reached: bool | None = None
+    hops: list[TracerouteHop] | None = None
     error: str | None = None
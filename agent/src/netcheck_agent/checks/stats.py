@@ -0,0 +1,168 @@
+import math
+from bisect import insort
+
+# до стольких значений квантиль считается точно: на малых выборках оценка
+# P² заметно смещена (p95 по 6-20 значениям - на единицы и десятки мс)
+EXACT_SAMPLES = 50
+
+
+class P2Quantile:
+    """
+    Потоковая оценка квантиля алгоритмом P² (Jain, Chlamtac, 1985).
+
+    Пока значений не больше EXACT_SAMPLES, они хранятся отсортированными
+    и квантиль считается точно. Дальше маркеры P² расставляются по этой
+    выборке, и хранятся только пять маркеров.
+    """
+
+    __slots__ = (
+        "p",
+        "_sample",
+        "_heights",
+        "_positions",
+        "_desired",
+        "_increments",
+    )
+
+    def __init__(self, p: float) -> None:
+        self.p = p
+        self._sample: list[float] | None = []
+        self._heights: list[float] = []
+        self._positions: list[int] = []
+        self._desired: list[float] = []
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        if self._sample is not None:
+            insort(self._sample, value)
+            if len(self._sample) > EXACT_SAMPLES:
+                self._init_markers()
+            return
+
+        q = self._heights
+        n = self._positions
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if value < q[i]) - 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _init_markers(self) -> None:
+        sample, self._sample = self._sample, None
+        last = len(sample) - 1
+        self._desired = [last * increment for increment in self._increments]
+        positions = []
+        for i, desired in enumerate(self._desired):
+            # маркеры стоят на разных позициях по возрастанию
+            position = max(round(desired), positions[-1] + 1 if positions else 0)
+            positions.append(min(position, last - (4 - i)))
+        self._positions = positions
+        self._heights = [sample[position] for position in positions]
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float | None:
+        q = self._sample
+        if q is None:
+            return self._heights[2]
+        if not q:
+            return None
+        # точное значение с линейной интерполяцией
+        rank = self.p * (len(q) - 1)
+        low = math.floor(rank)
+        high = min(low + 1, len(q) - 1)
+        return q[low] + (q[high] - q[low]) * (rank - low)
+
+
+class RttStats:
+    """
+    Статистика RTT серии проб, обновляемая по мере прихода ответов.
+
+    Среднее и дисперсия считаются методом Велфорда, джиттер - как средняя
+    разница между соседними RTT, перцентили - точно по первым
+    EXACT_SAMPLES значениям, дальше оценкой P².
+    """
+
+    def __init__(self) -> None:
+        self.sent = 0
+        self.received = 0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._jitter = 0.0
+        self._last: float | None = None
+        self._p50 = P2Quantile(0.5)
+        self._p95 = P2Quantile(0.95)
+
+    def add_sent(self) -> None:
+        self.sent += 1
+
+    def add(self, rtt: float) -> None:
+        self.received += 1
+        self.min = rtt if self.min is None else min(self.min, rtt)
+        self.max = rtt if self.max is None else max(self.max, rtt)
+
+        delta = rtt - self._mean
+        self._mean += delta / self.received
+        self._m2 += delta * (rtt - self._mean)
+
+        if self._last is not None:
+            self._jitter += (abs(rtt - self._last) - self._jitter) / (self.received - 1)
+        self._last = rtt
+
+        self._p50.add(rtt)
+        self._p95.add(rtt)
+
+    @property
+    def avg(self) -> float | None:
+        return self._mean if self.received else None
+
+    @property
+    def stddev(self) -> float | None:
+        if not self.received:
+            return None
+        return math.sqrt(self._m2 / self.received)
+
+    @property
+    def jitter(self) -> float | None:
+        return self._jitter if self.received > 1 else None
+
+    @property
+    def p50(self) -> float | None:
+        return self._p50.value
+
+    @property
+    def p95(self) -> float | None:
+        return self._p95.value
+
+    @property
+    def packet_loss(self) -> float | None:
+        if not self.sent:
+            return None
+        return (self.sent - self.received) / self.sent * 100
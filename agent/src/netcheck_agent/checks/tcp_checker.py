@@ -1,29 +1,112 @@
 import asyncio
 import datetime
+import errno
+import time
 from urllib.parse import urlparse
 
+from netcheck_agent.engines import get_dns_cache, get_dns_pool
 from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
 
 from .base_checker import BaseChecker
-from .schemas import TcpResult
+from .schemas import TcpOptions, TcpPortResult, TcpResult
 
 
 class TcpChecker(BaseChecker):
+    engines = (get_dns_pool,)
+
+    async def _open_connection(self, host: str, port: int, bypass_dns_cache: bool):
+        addresses = await get_dns_cache().resolve_addresses(
+            host, bypass=bypass_dns_cache
+        )
+        error: Exception | None = None
+        for _, address in addresses:
+            try:
+                return await asyncio.open_connection(address, port)
+            except OSError as e:
+                error = e
+        raise error or OSError(f"No addresses for {host}")
+
+    async def _probe_port(
+        self, address: str, port: int, timeout: float, semaphore: asyncio.Semaphore
+    ) -> TcpPortResult:
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(address, port), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                return TcpPortResult(state="filtered")
+            except ConnectionRefusedError:
+                return TcpPortResult(state="closed")
+            except OSError as e:
+                return TcpPortResult(state=errno.errorcode.get(e.errno or 0, "error"))
+            latency = round((time.monotonic() - start) * 1000, 2)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return TcpPortResult(state="open", latency_ms=latency)
+
+    async def _scan(self, host: str, options: TcpOptions) -> CheckResponseBase:
+        """
+        Проверяет список портов с ограничением числа одновременных подключений.
+        """
+        try:
+            addresses = await get_dns_cache().resolve_addresses(
+                host, bypass=options.bypass_dns_cache
+            )
+        except Exception as e:
+            return CheckResponseBase(
+                success=False, result=TcpResult(success_connect=False, error=str(e))
+            )
+        _, address = addresses[0]
+
+        semaphore = asyncio.Semaphore(options.concurrency)
+        ports = options.scan_ports
+        results = await asyncio.gather(
+            *(
+                self._probe_port(address, port, options.connect_timeout, semaphore)
+                for port in ports
+            )
+        )
+        open_ports = [port for port, res in zip(ports, results) if res.state == "open"]
+        return CheckResponseBase(
+            success=bool(open_ports),
+            # ни один порт не ответил
+            timed_out=all(res.state == "filtered" for res in results),
+            result=TcpResult(
+                success_connect=bool(open_ports),
+                ports=dict(zip(ports, results)),
+                open_ports=open_ports,
+            ),
+        )
 
     async def _connect(self, request: CheckRequest) -> CheckResponseBase:
+        options = TcpOptions.model_validate(request.options)
         parsed = urlparse(request.host)
         host = parsed.hostname or request.host
+        if options.scan_ports:
+            return await self._scan(host, options)
         port = request.port or 80
 
         try:
             reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(host, port), timeout=5
+                self._open_connection(host, port, options.bypass_dns_cache),
+                timeout=options.connect_timeout,
             )
             writer.close()
             await writer.wait_closed()
             return CheckResponseBase(
                 success=True, result=TcpResult(success_connect=True)
             )
+        except asyncio.TimeoutError:
+            return CheckResponseBase(
+                success=False,
+                timed_out=True,
+                result=TcpResult(success_connect=False, error="Connection timeout"),
+            )
         except Exception as e:
             return CheckResponseBase(
                 success=False, result=TcpResult(success_connect=False, error=str(e))
@@ -36,6 +119,7 @@ class TcpChecker(BaseChecker):
                 success=result.success,
                 latency_ms=latency,
                 result=result.result,
+                timed_out=result.timed_out,
                 timestamp=datetime.datetime.now(datetime.UTC),
             )
         except Exception as e:
@@ -0,0 +1,163 @@
+import asyncio
+import datetime
+from collections import Counter
+from urllib.parse import urlparse
+
+from netcheck_agent.engines import (
+    IcmpReply,
+    get_dns_cache,
+    get_dns_pool,
+    get_icmp_engine,
+)
+from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
+
+from .base_checker import BaseChecker
+from .schemas import TracerouteHop, TracerouteOptions, TracerouteResult
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+class _ProbeSet:
+    """
+    Пробы всех TTL одной трассировки.
+
+    Трассировка считается завершенной, когда ответили (или истекли)
+    все пробы с TTL не больше того, на котором ответил сам адрес
+    назначения, поэтому ждать ответов с более дальних TTL не нужно.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.by_ttl: dict[int, list[asyncio.Future[IcmpReply]]] = {}
+        self.last_ttl: int | None = None
+        self.finished = loop.create_future()
+        self._sealed = False
+
+    def add(self, ttl: int, future: asyncio.Future[IcmpReply]) -> None:
+        self.by_ttl.setdefault(ttl, []).append(future)
+        future.add_done_callback(lambda f: self._on_reply(ttl, f))
+
+    def _on_reply(self, ttl: int, future: asyncio.Future[IcmpReply]) -> None:
+        if self.finished.done():
+            return
+        if not future.cancelled() and future.exception() is None:
+            reply = future.result()
+            # ответ узла назначения или отказ в доставке завершает путь
+            if reply.kind != "ttl_exceeded" and (
+                self.last_ttl is None or ttl < self.last_ttl
+            ):
+                self.last_ttl = ttl
+        self._check_finished()
+
+    def seal(self) -> None:
+        """Все пробы отправлены, можно проверять завершение."""
+        self._sealed = True
+        self._check_finished()
+
+    def _check_finished(self) -> None:
+        if not self._sealed:
+            return
+        last_ttl = self.last_ttl or max(self.by_ttl, default=0)
+        for ttl in range(1, last_ttl + 1):
+            if not all(f.done() for f in self.by_ttl.get(ttl, ())):
+                return
+        if not self.finished.done():
+            self.finished.set_result(None)
+
+    def cancel(self) -> None:
+        for futures in self.by_ttl.values():
+            for future in futures:
+                future.cancel()
+
+    def hops(self) -> list[TracerouteHop]:
+        last_ttl = self.last_ttl or max(self.by_ttl, default=0)
+        hops = []
+        for ttl in range(1, last_ttl + 1):
+            futures = self.by_ttl[ttl]
+            replies = [
+                f.result()
+                for f in futures
+                if f.done() and not f.cancelled() and f.exception() is None
+            ]
+            rtts = [reply.rtt * 1000 for reply in replies]
+            address = None
+            if replies:
+                address = Counter(r.address for r in replies).most_common(1)[0][0]
+            hops.append(
+                TracerouteHop(
+                    ttl=ttl,
+                    address=address,
+                    loss=_round((1 - len(replies) / len(futures)) * 100),
+                    min_ms=_round(min(rtts, default=None)),
+                    avg_ms=_round(sum(rtts) / len(rtts) if rtts else None),
+                    max_ms=_round(max(rtts, default=None)),
+                )
+            )
+        if self.last_ttl is None:
+            # хвост из молчащих узлов не несет информации
+            while hops and hops[-1].address is None:
+                hops.pop()
+        return hops
+
+
+class TracerouteChecker(BaseChecker):
+    engines = (get_dns_pool, get_icmp_engine)
+
+    async def _trace(self, request: CheckRequest) -> CheckResponseBase:
+        options = TracerouteOptions.model_validate(request.options)
+        parsed = urlparse(request.host)
+        host = parsed.hostname or request.host
+        try:
+            addresses = await get_dns_cache().resolve_addresses(
+                host, bypass=options.bypass_dns_cache
+            )
+        except Exception as e:
+            return CheckResponseBase(
+                success=False, result=TracerouteResult(error=str(e))
+            )
+        family, address = addresses[0]
+
+        engine = get_icmp_engine()
+        probe_set = _ProbeSet(asyncio.get_running_loop())
+        try:
+            # пробы всех TTL уходят сразу, а не по одному узлу за раз,
+            # поэтому весь путь занимает около одного самого долгого RTT
+            for _ in range(options.probes):
+                for ttl in range(1, options.max_hops + 1):
+                    future = await engine.send(
+                        address, family, timeout=options.timeout, ttl=ttl
+                    )
+                    probe_set.add(ttl, future)
+            probe_set.seal()
+            await probe_set.finished
+        except OSError as e:
+            return CheckResponseBase(
+                success=False,
+                result=TracerouteResult(destination=address, error=str(e)),
+            )
+        finally:
+            probe_set.cancel()
+
+        hops = probe_set.hops()
+        reached = bool(hops) and hops[-1].address == address
+        return CheckResponseBase(
+            success=reached,
+            result=TracerouteResult(destination=address, reached=reached, hops=hops),
+        )
+
+    async def check(self, request: CheckRequest) -> CheckResponse:
+        try:
+            result, latency = await self._measure_latency(self._trace(request))
+            return CheckResponse(
+                success=result.success,
+                latency_ms=latency,
+                result=result.result,
+                timestamp=datetime.datetime.now(datetime.UTC),
+            )
+        except Exception as e:
+            return CheckResponse(
+                success=False,
+                error=str(e),
+                timestamp=datetime.datetime.now(datetime.UTC),
+            )
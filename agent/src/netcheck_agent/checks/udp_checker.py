@@ -0,0 +1,153 @@
+import asyncio
+import datetime
+import os
+import struct
+import time
+from urllib.parse import urlparse
+
+from netcheck_agent.engines import get_dns_cache, get_dns_pool
+from netcheck_agent.schemas import CheckRequest, CheckResponse, CheckResponseBase
+
+from .base_checker import BaseChecker
+from .schemas import UdpOptions, UdpProbe, UdpResult
+
+DEFAULT_PORTS = {
+    UdpProbe.DNS: 53,
+    UdpProbe.NTP: 123,
+}
+
+
+class _UdpProbeProtocol(asyncio.DatagramProtocol):
+    """Ждет первый ответ или ICMP ошибку на подключенном UDP сокете."""
+
+    def __init__(self, waiter: asyncio.Future[bytes]) -> None:
+        self.waiter = waiter
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if not self.waiter.done():
+            self.waiter.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.waiter.done():
+            self.waiter.set_exception(exc)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if exc is not None and not self.waiter.done():
+            self.waiter.set_exception(exc)
+
+
+def _dns_probe() -> tuple[bytes, bytes]:
+    """Запрос NS записей корневой зоны; ответ должен вернуть тот же ID."""
+    query_id = os.urandom(2)
+    header = query_id + struct.pack("!HHHHH", 0x0100, 1, 0, 0, 0)
+    question = b"\x00" + struct.pack("!HH", 2, 1)
+    return header + question, query_id
+
+
+def _ntp_probe() -> tuple[bytes, bytes]:
+    """Клиентский NTP пакет (LI=0, VN=4, Mode=3)."""
+    return b"\x23" + b"\x00" * 47, b""
+
+
+def _validate_response(probe: UdpProbe | None, expected: bytes, data: bytes) -> bool:
+    if probe == UdpProbe.DNS:
+        return len(data) >= 12 and data[:2] == expected and bool(data[2] & 0x80)
+    if probe == UdpProbe.NTP:
+        return len(data) >= 48 and data[0] & 0x07 == 4
+    return expected in data
+
+
+class UdpChecker(BaseChecker):
+    engines = (get_dns_pool,)
+
+    def _build_probe(self, options: UdpOptions) -> tuple[bytes, bytes]:
+        """:return: (полезная нагрузка, ожидаемые байты ответа)"""
+        if options.probe == UdpProbe.DNS:
+            return _dns_probe()
+        if options.probe == UdpProbe.NTP:
+            return _ntp_probe()
+        # asyncio не отправляет пустые датаграммы, поэтому шлем хотя бы один байт
+        payload = bytes.fromhex(options.payload_hex or "") or b"\x00"
+        expected = bytes.fromhex(options.expect_hex or "")
+        return payload, expected
+
+    async def _probe(self, request: CheckRequest) -> CheckResponseBase:
+        options = UdpOptions.model_validate(request.options)
+        parsed = urlparse(request.host)
+        host = parsed.hostname or request.host
+        port = request.port or DEFAULT_PORTS.get(options.probe)
+        if port is None:
+            return CheckResponseBase(
+                success=False, result=UdpResult(error="Port is required")
+            )
+
+        try:
+            addresses = await get_dns_cache().resolve_addresses(
+                host, bypass=options.bypass_dns_cache
+            )
+        except Exception as e:
+            return CheckResponseBase(success=False, result=UdpResult(error=str(e)))
+        _, address = addresses[0]
+
+        payload, expected = self._build_probe(options)
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future[bytes] = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpProbeProtocol(waiter), remote_addr=(address, port)
+        )
+        try:
+            start = time.monotonic()
+            transport.sendto(payload)
+            try:
+                data = await asyncio.wait_for(waiter, timeout=options.timeout)
+            except asyncio.TimeoutError:
+                # ни ответа, ни ICMP ошибки: порт открыт и молчит или фильтруется
+                return CheckResponseBase(
+                    success=False, result=UdpResult(state="filtered")
+                )
+            except ConnectionRefusedError:
+                return CheckResponseBase(
+                    success=False,
+                    result=UdpResult(
+                        state="unreachable",
+                        rtt_ms=round((time.monotonic() - start) * 1000, 2),
+                        error="ICMP port unreachable",
+                    ),
+                )
+            except OSError as e:
+                return CheckResponseBase(
+                    success=False,
+                    result=UdpResult(state="unreachable", error=str(e)),
+                )
+            rtt_ms = round((time.monotonic() - start) * 1000, 2)
+        finally:
+            transport.close()
+
+        response_valid = None
+        if options.probe is not None or expected:
+            response_valid = _validate_response(options.probe, expected, data)
+        return CheckResponseBase(
+            success=response_valid is not False,
+            result=UdpResult(
+                state="reachable",
+                rtt_ms=rtt_ms,
+                response_size=len(data),
+                response_valid=response_valid,
+            ),
+        )
+
+    async def check(self, request: CheckRequest) -> CheckResponse:
+        try:
+            result, latency = await self._measure_latency(self._probe(request))
+            return CheckResponse(
+                success=result.success,
+                latency_ms=latency,
+                result=result.result,
+                timestamp=datetime.datetime.now(datetime.UTC),
+            )
+        except Exception as e:
+            return CheckResponse(
+                success=False,
+                error=str(e),
+                timestamp=datetime.datetime.now(datetime.UTC),
+            )
@@ -0,0 +1,80 @@
+import asyncio
+import json
+from logging import getLogger
+from typing import Awaitable, Callable
+
+from netcheck_agent.schemas import CheckRequest, CheckResponse
+
+logger = getLogger(__name__)
+
+
+def coalescing_key(request: CheckRequest) -> tuple:
+    options = json.dumps(request.options, sort_keys=True, default=str)
+    return request.request_type, request.host, request.port, options
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task[CheckResponse]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class CheckCoalescer:
+    """
+    Объединяет одинаковые проверки, выполняющиеся одновременно.
+
+    Запрос с тем же типом, хостом, портом и опциями, пришедший, пока такая
+    проверка еще идет, не запускает новую, а ждет ее результат. Каждый
+    запрос получает свой ответ, ответы присоединившихся помечаются
+    `coalesced`. Проверка выполняется в отдельной задаче: отмена одного из
+    ожидающих (например, по сроку запроса) не прерывает ее для остальных,
+    она отменяется, только когда ее больше никто не ждет.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[tuple, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def check(
+        self, request: CheckRequest, run: Callable[[], Awaitable[CheckResponse]]
+    ) -> CheckResponse:
+        """:param run: выполняет проверку, если такой еще не идет"""
+        key = coalescing_key(request)
+        flight = self._flights.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(run()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            logger.debug(f"Coalesced {request.request_type} check of {request.host}")
+
+        flight.waiters += 1
+        try:
+            response = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+
+        if coalesced:
+            return response.model_copy(update={"coalesced": True})
+        return response
+
+    def _forget(self, key: tuple, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+_check_coalescer_instance: CheckCoalescer | None = None
+
+
+def get_check_coalescer() -> CheckCoalescer:
+    global _check_coalescer_instance
+    if _check_coalescer_instance is None:
+        _check_coalescer_instance = CheckCoalescer()
+    return _check_coalescer_instance
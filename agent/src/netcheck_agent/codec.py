@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from typing import Annotated
+from uuid import UUID
+
+from pydantic import Field, TypeAdapter
+
+from netcheck_agent.schemas import CheckRequestRMQ, CheckResponse, SubscriptionControl
+
+# тот же кодировщик, что использует json.dumps с настройками по умолчанию
+_encode = json.JSONEncoder().encode
+_timestamp_adapter = TypeAdapter(datetime)
+# запросы проверок приходят намного чаще, поэтому пробуются первыми
+_message_adapter = TypeAdapter(
+    Annotated[CheckRequestRMQ | SubscriptionControl, Field(union_mode="left_to_right")]
+)
+
+
+def decode_request(data: bytes) -> CheckRequestRMQ:
+    """Разбирает запрос целиком в pydantic-core, без промежуточного dict."""
+    return CheckRequestRMQ.model_validate_json(data)
+
+
+def decode_message(data: bytes) -> CheckRequestRMQ | SubscriptionControl:
+    """Разбирает запрос проверки или управляющее сообщение подписок."""
+    return _message_adapter.validate_json(data)
+
+
+def encode_response(
+    response: CheckResponse,
+    request_id: UUID,
+    agent_id: UUID,
+    subscription_id: UUID | None = None,
+) -> bytes:
+    """
+    Кодирует ответ проверки в JSON для очереди ответов.
+
+    Результат побайтно совпадает с
+    `json.dumps(CheckResponseRMQ(...).model_dump(mode="json")).encode()`,
+    но без создания CheckResponseRMQ и словаря всего сообщения: схема
+    конверта фиксирована, поэтому он собирается из готовых фрагментов.
+    """
+    result = response.result
+    timestamp = _timestamp_adapter.dump_python(response.timestamp, mode="json")
+    return "".join(
+        (
+            '{"success": ',
+            "true" if response.success else "false",
+            ', "error": ',
+            _encode(response.error),
+            ', "result": ',
+            _encode(result.model_dump(mode="json")) if result is not None else "{}",
+            ', "latency_ms": ',
+            _encode(response.latency_ms),
+            ', "timestamp": "',
+            timestamp,
+            '", "coalesced": ',
+            "true" if response.coalesced else "false",
+            ', "request_id": "',
+            str(request_id),
+            '", "agent_id": "',
+            str(agent_id),
+            '", "subscription_id": ',
+            "null" if subscription_id is None else f'"{subscription_id}"',
+            "}",
+        )
+    ).encode()
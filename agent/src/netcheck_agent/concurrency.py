@@ -0,0 +1,200 @@
+import asyncio
+import os
+import resource
+from collections import deque
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Coroutine
+
+from netcheck_agent.schemas import CheckResponse
+
+logger = getLogger(__name__)
+
+INCREASE_STEP = 2
+DECREASE_FACTOR = 0.75
+# меньше завершенных проверок за интервал - долю таймаутов не учитываем
+MIN_TIMEOUT_SAMPLES = 5
+
+
+def open_fds() -> int | None:
+    """:return: число открытых файловых дескрипторов процесса или None"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def fd_headroom() -> float | None:
+    """:return: доля свободных файловых дескрипторов или None, если неизвестно"""
+    try:
+        soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (OSError, ValueError):
+        return None
+    fds = open_fds()
+    if fds is None or soft_limit == resource.RLIM_INFINITY or soft_limit <= 0:
+        return None
+    return max(0.0, 1 - fds / soft_limit)
+
+
+class ConcurrencyController:
+    """
+    Адаптивный (AIMD) лимит одновременных проверок агента.
+
+    Обработчик сообщения ждет свободное место, запускает проверку в
+    отдельной задаче и ждет ее завершения, так что сообщение
+    подтверждается только после публикации ответа. Воркеров очереди
+    запускается max_limit, поэтому число одновременных проверок задает
+    лимит. Пока мест нет, воркеры не забирают новые сообщения.
+
+    Раз в interval смотрит на задержку event loop, долю проверок,
+    закончившихся таймаутом, и запас файловых дескрипторов. Если хоть
+    один сигнал перегрузки сработал, лимит умножается на DECREASE_FACTOR,
+    иначе, если лимит был исчерпан, увеличивается на INCREASE_STEP.
+    Лимит всегда остается в пределах min_limit..max_limit.
+    """
+
+    def __init__(
+        self,
+        min_limit: int,
+        max_limit: int,
+        initial_limit: int,
+        interval: float,
+        max_loop_lag: float,
+        max_timeout_rate: float,
+        min_fd_headroom: float,
+        on_change: Callable[[int], Awaitable[None]] | None = None,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial_limit, min_limit), max_limit)
+        self.interval = interval
+        self.max_loop_lag = max_loop_lag
+        self.max_timeout_rate = max_timeout_rate
+        self.min_fd_headroom = min_fd_headroom
+        self.on_change = on_change
+
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._saturated = False
+        self._completed = 0
+        self._timeouts = 0
+        self._checks: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def queued(self) -> int:
+        """Число проверок, ждущих свободного места."""
+        return len(self._waiters)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Останавливает подстройку и дожидается запущенных проверок."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._checks:
+            await asyncio.gather(*self._checks, return_exceptions=True)
+
+    async def spawn(self, check: Coroutine[Any, Any, CheckResponse]) -> asyncio.Task:
+        """Ждет свободное место и запускает проверку в фоне."""
+        try:
+            await self._acquire()
+        except BaseException:
+            check.close()
+            raise
+        task = asyncio.create_task(self._run_check(check))
+        self._checks.add(task)
+        task.add_done_callback(self._checks.discard)
+        return task
+
+    async def _run_check(self, check: Coroutine[Any, Any, CheckResponse]) -> None:
+        try:
+            response = await check
+        except Exception:
+            logger.error("Check failed", exc_info=True)
+            return
+        finally:
+            self._release()
+        self._completed += 1
+        if response.timed_out:
+            self._timeouts += 1
+
+    async def _acquire(self) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            if self.in_flight >= self.limit:
+                self._saturated = True
+            return
+        self._saturated = True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # место уже было выдано, возвращаем его следующему
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            try:
+                await self._adjust(lag)
+            except Exception:
+                logger.error("Concurrency adjustment failed", exc_info=True)
+
+    def _overload_reason(self, lag: float) -> str | None:
+        if lag > self.max_loop_lag:
+            return f"event loop lag {lag:.3f}s"
+        if self._completed >= MIN_TIMEOUT_SAMPLES:
+            timeout_rate = self._timeouts / self._completed
+            if timeout_rate > self.max_timeout_rate:
+                return f"timeout rate {timeout_rate:.0%}"
+        headroom = fd_headroom()
+        if headroom is not None and headroom < self.min_fd_headroom:
+            return f"fd headroom {headroom:.0%}"
+        return None
+
+    async def _adjust(self, lag: float) -> None:
+        reason = self._overload_reason(lag)
+        if reason is not None:
+            limit = max(self.min_limit, int(self.limit * DECREASE_FACTOR))
+        elif self._saturated:
+            limit = min(self.max_limit, self.limit + INCREASE_STEP)
+        else:
+            limit = self.limit
+        self._saturated = self.in_flight >= limit
+        self._completed = 0
+        self._timeouts = 0
+
+        if limit == self.limit:
+            return
+        if reason is not None:
+            logger.info(f"Concurrency limit {self.limit} -> {limit}: {reason}")
+        else:
+            logger.debug(f"Concurrency limit {self.limit} -> {limit}")
+        self.limit = limit
+        self._wake_up()
+        if self.on_change is not None:
+            await self.on_change(limit)
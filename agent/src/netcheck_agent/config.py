@@ -19,6 +19,72 @@ class Config(BaseSettings):
     REGION: str
     GET_IP_API_URL: str
     NUM_WORKERS: int
+    AGENT_PROCESSES: int = 1
+    USE_UVLOOP: bool = False
+
+    HTTP_POOL_LIMIT: int = 1000
+    HTTP_POOL_LIMIT_PER_HOST: int = 0
+    HTTP_KEEPALIVE_TIMEOUT: float = 15.0
+    HTTP_MAX_BODY_BYTES: int = 1024 * 1024
+
+    DNS_RESOLVER_POOL_SIZE: int = 4
+    DNS_TIMEOUT: float = 5.0
+    # пусто - системные DNS серверы, адреса в виде "ip" или "ip:port"
+    DNS_NAMESERVERS: list[str] = []
+    DNS_CACHE_SIZE: int = 10000
+    DNS_CACHE_MIN_TTL: float = 5.0
+    DNS_CACHE_MAX_TTL: float = 300.0
+
+    ICMP_SOCKET_BUFFER: int = 4 * 1024 * 1024
+
+    CHECK_COALESCING_ENABLED: bool = False
+
+    RATE_LIMIT_ENABLED: bool = False
+    # проверок в секунду на один хост по типам проверок
+    RATE_LIMITS: dict[str, float] = {
+        "HTTP": 2.0,
+        "PING": 5.0,
+        "TCP_CONNECT": 5.0,
+        "UDP_CONNECT": 5.0,
+        "DNS": 10.0,
+        "TRACEROUTE": 1.0,
+    }
+    RATE_LIMIT_BURST: int = 5
+    RATE_LIMIT_MAX_WAIT: float = 1.0
+    RATE_LIMIT_IDLE_TIMEOUT: float = 60.0
+
+    RESPONSE_BATCH_ENABLED: bool = False
+    RESPONSE_BATCH_MAX_MESSAGES: int = 100
+    RESPONSE_BATCH_MAX_BYTES: int = 256 * 1024
+    RESPONSE_BATCH_FLUSH_INTERVAL: float = 0.05
+
+    SPOOL_ENABLED: bool = False
+    SPOOL_DIR: str = "spool"
+    SPOOL_SEGMENT_BYTES: int = 4 * 1024 * 1024
+    SPOOL_MAX_BYTES: int = 256 * 1024 * 1024
+    SPOOL_FSYNC_INTERVAL: float = 0.2
+    SPOOL_PUBLISH_TIMEOUT: float = 5.0
+
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 9108
+
+    CHECK_POOLS_ENABLED: bool = False
+    # лимиты одновременных проверок по типам, остальные типы - NUM_WORKERS
+    CHECK_POOL_LIMITS: dict[str, int] = {
+        "HTTP": 20,
+        "TRACEROUTE": 2,
+        "INFO": 2,
+    }
+    CHECK_POOL_MAX_QUEUED: int = 100
+
+    CONCURRENCY_ADAPTIVE: bool = False
+    CONCURRENCY_MIN: int = 1
+    CONCURRENCY_MAX: int = 200
+    CONCURRENCY_ADJUST_INTERVAL: float = 1.0
+    CONCURRENCY_MAX_LOOP_LAG: float = 0.1
+    CONCURRENCY_MAX_TIMEOUT_RATE: float = 0.2
+    CONCURRENCY_MIN_FD_HEADROOM: float = 0.1
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -0,0 +1,26 @@
+from .dns import (
+    CachedResolver,
+    DnsCache,
+    DnsResolverPool,
+    dns_cache_bypass,
+    get_dns_cache,
+    get_dns_pool,
+)
+from .http_client import HttpClientEngine, get_http_engine
+from .http_tracing import HttpPhaseTimer
+from .icmp import IcmpEngine, IcmpReply, get_icmp_engine
+
+__all__ = [
+    "CachedResolver",
+    "DnsCache",
+    "DnsResolverPool",
+    "HttpClientEngine",
+    "HttpPhaseTimer",
+    "IcmpEngine",
+    "IcmpReply",
+    "dns_cache_bypass",
+    "get_dns_cache",
+    "get_dns_pool",
+    "get_http_engine",
+    "get_icmp_engine",
+]
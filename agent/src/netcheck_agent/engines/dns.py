@@ -0,0 +1,245 @@
+import asyncio
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import cycle
+from typing import Any, Awaitable, Callable
+
+import aiodns
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+from netcheck_agent.config import get_config
+
+_bypass_cache: ContextVar[bool] = ContextVar("dns_cache_bypass", default=False)
+
+
+class DnsResolverPool:
+    """
+    Общий для агента набор c-ares резолверов.
+
+    Каждый резолвер держит свой канал, запросы распределяются по ним
+    по кругу, так что проверки не создают новый канал на каждый вызов.
+    """
+
+    def __init__(
+        self, size: int, timeout: float, nameservers: list[str] | None = None
+    ) -> None:
+        self.size = size
+        self.timeout = timeout
+        self.nameservers = nameservers
+        self._resolvers: list[aiodns.DNSResolver] = []
+        self._cycle = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._resolvers)
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._resolvers = [
+            aiodns.DNSResolver(nameservers=self.nameservers, timeout=self.timeout)
+            for _ in range(self.size)
+        ]
+        self._cycle = cycle(self._resolvers)
+
+    def get(self) -> aiodns.DNSResolver:
+        if self._cycle is None:
+            raise RuntimeError("DNS resolver pool is not started")
+        return next(self._cycle)
+
+    async def close(self) -> None:
+        for resolver in self._resolvers:
+            await resolver.close()
+        self._resolvers = []
+        self._cycle = None
+
+
+_dns_pool_instance: DnsResolverPool | None = None
+
+
+def get_dns_pool() -> DnsResolverPool:
+    global _dns_pool_instance
+    if _dns_pool_instance is None:
+        config = get_config()
+        _dns_pool_instance = DnsResolverPool(
+            size=config.DNS_RESOLVER_POOL_SIZE,
+            timeout=config.DNS_TIMEOUT,
+            nameservers=config.DNS_NAMESERVERS or None,
+        )
+    return _dns_pool_instance
+
+
+@contextmanager
+def dns_cache_bypass(enabled: bool = True):
+    """Резолвы внутри блока идут мимо кеша (для резолвера aiohttp)."""
+    token = _bypass_cache.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+class DnsCache:
+    """
+    Общий для всех проверок кеш DNS ответов.
+
+    Время жизни записи берется из TTL ответа (в пределах min_ttl..max_ttl),
+    размер ограничен, при переполнении вытесняются давно не использованные
+    записи. Одновременные промахи по одному ключу ждут один и тот же запрос.
+    """
+
+    def __init__(
+        self, pool: DnsResolverPool, max_size: int, min_ttl: float, max_ttl: float
+    ) -> None:
+        self.pool = pool
+        self.max_size = max_size
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def resolve_addresses(
+        self,
+        host: str,
+        family: int = socket.AF_UNSPEC,
+        bypass: bool = False,
+    ) -> list[tuple[int, str]]:
+        """
+        :return: список (семейство адресов, IP) для хоста
+        """
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            return [(socket.AF_INET6 if ip.version == 6 else socket.AF_INET, host)]
+
+        return await self._get(
+            ("ADDR", host, family),
+            lambda: self._load_addresses(host, family),
+            bypass or _bypass_cache.get(),
+        )
+
+    async def query(self, host: str, record_type: str, bypass: bool = False) -> list:
+        return await self._get(
+            (record_type, host),
+            lambda: self._load_query(host, record_type),
+            bypass or _bypass_cache.get(),
+        )
+
+    async def _get(
+        self,
+        key: tuple,
+        loader: Callable[[], Awaitable[tuple[Any, float]]],
+        bypass: bool,
+    ) -> Any:
+        if not bypass:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(_inflight_done_callback(self._inflight, key))
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: tuple, loader: Callable[[], Awaitable[tuple[Any, float]]]
+    ) -> Any:
+        value, ttl = await loader()
+        ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return value
+
+    async def _load_addresses(
+        self, host: str, family: int
+    ) -> tuple[list[tuple[int, str]], float]:
+        response = await self.pool.get().getaddrinfo(
+            host, family=family, type=socket.SOCK_STREAM
+        )
+        addresses = []
+        for node in response.nodes:
+            address = (node.family, node.addr[0].decode("ascii"))
+            if address not in addresses:
+                addresses.append(address)
+        if not addresses:
+            raise aiodns.error.DNSError(None, "DNS lookup failed")
+        return addresses, min(node.ttl for node in response.nodes)
+
+    async def _load_query(self, host: str, record_type: str) -> tuple[list, float]:
+        records = await self.pool.get().query(host, record_type)
+        ttls = [r.ttl for r in records if getattr(r, "ttl", None) is not None]
+        return records, min(ttls, default=0)
+
+
+def _inflight_done_callback(inflight: dict[tuple, asyncio.Task], key: tuple):
+    def callback(task: asyncio.Task) -> None:
+        if inflight.get(key) is task:
+            del inflight[key]
+        if not task.cancelled():
+            # ошибку получают ожидающие, здесь только помечаем ее прочитанной
+            task.exception()
+
+    return callback
+
+
+class CachedResolver(AbstractResolver):
+    """Резолвер aiohttp поверх общего DnsCache."""
+
+    def __init__(self, cache: DnsCache) -> None:
+        self.cache = cache
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        try:
+            addresses = await self.cache.resolve_addresses(host, family)
+        except aiodns.error.DNSError as exc:
+            msg = exc.args[1] if len(exc.args) > 1 else "DNS lookup failed"
+            raise OSError(None, msg) from exc
+        return [
+            ResolveResult(
+                hostname=host,
+                host=address,
+                port=port,
+                family=address_family,
+                proto=0,
+                flags=socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+            )
+            for address_family, address in addresses
+        ]
+
+    async def close(self) -> None:
+        pass
+
+
+_dns_cache_instance: DnsCache | None = None
+
+
+def get_dns_cache() -> DnsCache:
+    global _dns_cache_instance
+    if _dns_cache_instance is None:
+        config = get_config()
+        _dns_cache_instance = DnsCache(
+            pool=get_dns_pool(),
+            max_size=config.DNS_CACHE_SIZE,
+            min_ttl=config.DNS_CACHE_MIN_TTL,
+            max_ttl=config.DNS_CACHE_MAX_TTL,
+        )
+    return _dns_cache_instance
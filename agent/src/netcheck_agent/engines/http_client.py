@@ -0,0 +1,103 @@
+import ssl
+
+import aiohttp
+from aiohttp.abc import AbstractResolver
+
+from netcheck_agent.config import get_config
+
+from .dns import CachedResolver, get_dns_cache
+from .http_tracing import create_ssl_context, create_trace_config
+
+
+class HttpClientEngine:
+    """
+    Долгоживущий HTTP клиент агента.
+
+    Держит пул соединений, общий SSL контекст и резолвер поверх общего
+    DNS кеша агента, чтобы не создавать их заново на каждую проверку.
+    Для проверок, где переиспользование соединений нежелательно, есть
+    "холодная" сессия: она делит с пулом SSL контекст и резолвер, но
+    каждый раз открывает новое соединение.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        limit_per_host: int,
+        keepalive_timeout: float,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        self._ssl_context: ssl.SSLContext | None = None
+        self._resolver: AbstractResolver | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._cold_session: aiohttp.ClientSession | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    async def start(self) -> None:
+        if self.started:
+            return
+
+        self._ssl_context = create_ssl_context()
+        self._resolver = CachedResolver(get_dns_cache())
+        trace_configs = [create_trace_config()]
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=False,
+                ssl=self._ssl_context,
+                resolver=self._resolver,
+            ),
+            trace_configs=trace_configs,
+        )
+        self._cold_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                force_close=True,
+                use_dns_cache=False,
+                ssl=self._ssl_context,
+                resolver=self._resolver,
+            ),
+            trace_configs=trace_configs,
+        )
+
+    def session(self, cold: bool = False) -> aiohttp.ClientSession:
+        if self._session is None or self._cold_session is None:
+            raise RuntimeError("HTTP client engine is not started")
+        return self._cold_session if cold else self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+        if self._cold_session is not None:
+            await self._cold_session.close()
+        if self._resolver is not None:
+            await self._resolver.close()
+
+        self._session = None
+        self._cold_session = None
+        self._resolver = None
+        self._ssl_context = None
+
+
+_http_engine_instance: HttpClientEngine | None = None
+
+
+def get_http_engine() -> HttpClientEngine:
+    global _http_engine_instance
+    if _http_engine_instance is None:
+        config = get_config()
+        _http_engine_instance = HttpClientEngine(
+            limit=config.HTTP_POOL_LIMIT,
+            limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+        )
+    return _http_engine_instance
@@ -0,0 +1,182 @@
+import ssl
+import time
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import aiohttp
+
+_current_timer: ContextVar["HttpPhaseTimer | None"] = ContextVar(
+    "http_phase_timer", default=None
+)
+
+
+def _round_ms(value: float | None) -> float | None:
+    if value is None:
+        return None
+    return round(value * 1000, 2)
+
+
+class HttpPhaseTimer:
+    """
+    Накопитель времени фаз одного HTTP запроса (с учетом редиректов).
+
+    Передается в aiohttp как `trace_request_ctx`, а на время запроса
+    выставляется в contextvar, чтобы SSL контекст мог отметить момент
+    начала TLS рукопожатия.
+    """
+
+    def __init__(self) -> None:
+        self.dns: float | None = None
+        self.connect: float | None = None
+        self.tls: float | None = None
+        self.ttfb: float | None = None
+        self.body: float | None = None
+        self.reused_connection = False
+
+        self._dns_start: float | None = None
+        self._connect_start: float | None = None
+        self._tls_start: float | None = None
+        self._headers_sent: float | None = None
+        self._response_start: float | None = None
+
+    def __enter__(self) -> "HttpPhaseTimer":
+        self._token = _current_timer.set(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _current_timer.reset(self._token)
+
+    @staticmethod
+    def _add(current: float | None, value: float) -> float:
+        return value if current is None else current + value
+
+    def dns_start(self) -> None:
+        self._dns_start = time.monotonic()
+
+    def dns_end(self) -> None:
+        if self._dns_start is not None:
+            self.dns = self._add(self.dns, time.monotonic() - self._dns_start)
+            self._dns_start = None
+
+    def connect_start(self) -> None:
+        self._connect_start = time.monotonic()
+        self._tls_start = None
+
+    def tls_start(self) -> None:
+        if self._connect_start is not None:
+            self._tls_start = time.monotonic()
+
+    def connect_end(self) -> None:
+        if self._connect_start is None:
+            return
+        now = time.monotonic()
+        if self._tls_start is not None:
+            self.connect = self._add(
+                self.connect, self._tls_start - self._connect_start
+            )
+            self.tls = self._add(self.tls, now - self._tls_start)
+        else:
+            self.connect = self._add(self.connect, now - self._connect_start)
+        self._connect_start = None
+        self._tls_start = None
+
+    def connection_reused(self) -> None:
+        self.reused_connection = True
+
+    def headers_sent(self) -> None:
+        self._headers_sent = time.monotonic()
+
+    def response_received(self) -> None:
+        now = time.monotonic()
+        if self._headers_sent is not None:
+            self.ttfb = self._add(self.ttfb, now - self._headers_sent)
+            self._headers_sent = None
+        self._response_start = now
+
+    def body_end(self) -> None:
+        if self._response_start is not None:
+            self.body = time.monotonic() - self._response_start
+
+    def as_ms(self) -> dict[str, float | bool | None]:
+        return {
+            "dns_ms": _round_ms(self.dns),
+            "connect_ms": _round_ms(self.connect),
+            "tls_ms": _round_ms(self.tls),
+            "ttfb_ms": _round_ms(self.ttfb),
+            "body_ms": _round_ms(self.body),
+            "reused_connection": self.reused_connection,
+        }
+
+
+class TimedSSLContext(ssl.SSLContext):
+    """
+    SSL контекст, отмечающий начало TLS рукопожатия.
+
+    asyncio вызывает `wrap_bio` сразу после установки TCP соединения,
+    поэтому этот момент разделяет время connect и TLS.
+    """
+
+    def wrap_bio(self, *args, **kwargs):
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.tls_start()
+        return super().wrap_bio(*args, **kwargs)
+
+
+def create_ssl_context() -> ssl.SSLContext:
+    context = TimedSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_default_certs()
+    return context
+
+
+def _timer(trace_config_ctx: SimpleNamespace) -> HttpPhaseTimer | None:
+    timer = trace_config_ctx.trace_request_ctx
+    return timer if isinstance(timer, HttpPhaseTimer) else None
+
+
+async def _on_dns_resolvehost_start(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.dns_start()
+
+
+async def _on_dns_resolvehost_end(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.dns_end()
+
+
+async def _on_connection_create_start(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.connect_start()
+
+
+async def _on_connection_create_end(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.connect_end()
+
+
+async def _on_connection_reuseconn(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.connection_reused()
+
+
+async def _on_request_headers_sent(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.headers_sent()
+
+
+async def _on_response_received(session, ctx, params) -> None:
+    if timer := _timer(ctx):
+        timer.response_received()
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+    trace_config.on_request_redirect.append(_on_response_received)
+    trace_config.on_request_end.append(_on_response_received)
+    return trace_config
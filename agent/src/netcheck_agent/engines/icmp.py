@@ -0,0 +1,337 @@
+import asyncio
+import os
+import socket
+import struct
+import time
+from logging import getLogger
+from typing import Callable, NamedTuple
+
+from netcheck_agent.config import get_config
+
+logger = getLogger(__name__)
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP6_ECHO_REQUEST = 128
+ICMP6_ECHO_REPLY = 129
+
+# ICMP ошибки, в которых роутер возвращает заголовок исходного эхо-запроса
+ICMP_ERRORS = {11: "ttl_exceeded", 3: "unreachable"}
+ICMP6_ERRORS = {3: "ttl_exceeded", 1: "unreachable"}
+
+_HEADER = struct.Struct("!BBHHH")
+
+
+class IcmpReply(NamedTuple):
+    """Ответ на эхо-запрос: время, адрес ответившего узла и тип ответа."""
+
+    rtt: float
+    address: str
+    kind: str = "echo"
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _expire(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(TimeoutError("Ping timeout"))
+
+
+class _IcmpSocket:
+    """Один ICMP сокет семейства адресов и таблица ожидающих ответов."""
+
+    def __init__(self, family: int, identifier: int, buffer_size: int) -> None:
+        self.family = family
+        self.identifier = identifier
+        proto = (
+            socket.IPPROTO_ICMP if family == socket.AF_INET else socket.IPPROTO_ICMPV6
+        )
+        try:
+            self.sock = socket.socket(family, socket.SOCK_RAW, proto)
+            self.raw = True
+        except PermissionError:
+            # без CAP_NET_RAW используем непривилегированный ping сокет,
+            # идентификатор в этом случае подменяет ядро
+            self.sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+            self.raw = False
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+
+        self.pending: dict[int, tuple[str, asyncio.Future[IcmpReply], float]] = {}
+        # ждущие освобождения буфера отправки
+        self.write_waiters: list[asyncio.Future[None]] = []
+        self._sequence = 0
+
+    def next_sequence(self) -> int:
+        for _ in range(0x10000):
+            self._sequence = (self._sequence + 1) & 0xFFFF
+            if self._sequence not in self.pending:
+                return self._sequence
+        raise RuntimeError("Too many ICMP echo requests in flight")
+
+    def build_packet(self, sequence: int, payload: bytes) -> bytes:
+        if self.family == socket.AF_INET:
+            header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, self.identifier, sequence)
+            checksum = _checksum(header + payload)
+            header = _HEADER.pack(
+                ICMP_ECHO_REQUEST, 0, checksum, self.identifier, sequence
+            )
+        else:
+            # контрольную сумму ICMPv6 считает ядро
+            header = _HEADER.pack(ICMP6_ECHO_REQUEST, 0, 0, self.identifier, sequence)
+        return header + payload
+
+    def parse_reply(self, packet: bytes) -> tuple[str, int, int, str | None] | None:
+        """
+        :return: (тип ответа, identifier, sequence, адрес назначения запроса)
+            или None; адрес назначения известен только для ICMP ошибок
+        """
+        if self.family == socket.AF_INET:
+            if self.raw:
+                packet = packet[(packet[0] & 0x0F) * 4 :]
+            echo_reply, echo_request, errors = (
+                ICMP_ECHO_REPLY,
+                ICMP_ECHO_REQUEST,
+                ICMP_ERRORS,
+            )
+        else:
+            echo_reply, echo_request, errors = (
+                ICMP6_ECHO_REPLY,
+                ICMP6_ECHO_REQUEST,
+                ICMP6_ERRORS,
+            )
+        if len(packet) < _HEADER.size:
+            return None
+        icmp_type, _, _, identifier, sequence = _HEADER.unpack_from(packet)
+        if icmp_type == echo_reply:
+            return "echo", identifier, sequence, None
+
+        kind = errors.get(icmp_type)
+        if kind is None:
+            return None
+        # за заголовком ошибки идет IP заголовок и начало исходного запроса
+        inner = packet[_HEADER.size :]
+        if self.family == socket.AF_INET:
+            if len(inner) < 20:
+                return None
+            target = socket.inet_ntop(socket.AF_INET, inner[16:20])
+            inner = inner[(inner[0] & 0x0F) * 4 :]
+        else:
+            if len(inner) < 40:
+                return None
+            target = socket.inet_ntop(socket.AF_INET6, inner[24:40])
+            inner = inner[40:]
+        if len(inner) < _HEADER.size:
+            return None
+        inner_type, _, _, identifier, sequence = _HEADER.unpack_from(inner)
+        if inner_type != echo_request:
+            return None
+        return kind, identifier, sequence, target
+
+    def close(self) -> None:
+        for _, future, _ in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+        for waiter in self.write_waiters:
+            if not waiter.done():
+                waiter.cancel()
+        self.write_waiters.clear()
+        self.sock.close()
+
+
+class IcmpEngine:
+    """
+    Общий ICMP движок агента.
+
+    Держит по одному сокету на семейство адресов. Каждый эхо-запрос
+    получает уникальный sequence, а ответы раздаются ожидающим future
+    поиском в таблице, так что число открытых дескрипторов не зависит
+    от числа одновременных пингов.
+    """
+
+    def __init__(self, socket_buffer: int) -> None:
+        self.socket_buffer = socket_buffer
+        self._identifier = os.getpid() & 0xFFFF
+        self._sockets: dict[int, _IcmpSocket] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._loop = asyncio.get_running_loop()
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                icmp_socket = _IcmpSocket(family, self._identifier, self.socket_buffer)
+            except OSError as e:
+                logger.warning(f"ICMP socket for {family.name} is unavailable: {e}")
+                continue
+            self._sockets[family] = icmp_socket
+            self._loop.add_reader(icmp_socket.sock.fileno(), self._on_readable, family)
+
+    def _on_readable(self, family: int) -> None:
+        icmp_socket = self._sockets[family]
+        while True:
+            try:
+                packet, addr = icmp_socket.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"ICMP receive failed: {e}")
+                return
+            received_at = time.monotonic()
+
+            reply = icmp_socket.parse_reply(packet)
+            if reply is None:
+                continue
+            kind, identifier, sequence, target = reply
+            if icmp_socket.raw and identifier != icmp_socket.identifier:
+                continue
+            waiter = icmp_socket.pending.get(sequence)
+            if waiter is None:
+                continue
+            address, future, sent_at = waiter
+            if (target or addr[0]) != address or future.done():
+                continue
+            future.set_result(IcmpReply(received_at - sent_at, addr[0], kind))
+
+    async def send(
+        self,
+        address: str,
+        family: int,
+        timeout: float,
+        payload_size: int = 56,
+        ttl: int | None = None,
+    ) -> asyncio.Future[IcmpReply]:
+        """
+        Отправляет один эхо-запрос, не дожидаясь ответа.
+
+        :param ttl: TTL (hop limit) запроса; ответы роутеров о его истечении
+            приходят только на raw сокет
+        :return: future с ответом; по истечении timeout в нем оказывается
+            TimeoutError
+        """
+        if self._loop is None:
+            raise RuntimeError("ICMP engine is not started")
+        icmp_socket = self._sockets.get(family)
+        if icmp_socket is None:
+            raise OSError(
+                f"ICMP is unavailable for {socket.AddressFamily(family).name}"
+            )
+        if ttl is not None and not icmp_socket.raw:
+            raise OSError("TTL limited probes require a raw ICMP socket (CAP_NET_RAW)")
+
+        sequence = icmp_socket.next_sequence()
+        packet = icmp_socket.build_packet(sequence, b"\x00" * payload_size)
+        future: asyncio.Future[IcmpReply] = self._loop.create_future()
+        icmp_socket.pending[sequence] = (address, future, time.monotonic())
+        expire_handle = self._loop.call_later(timeout, _expire, future)
+
+        def _cleanup(_: asyncio.Future) -> None:
+            expire_handle.cancel()
+            icmp_socket.pending.pop(sequence, None)
+
+        future.add_done_callback(_cleanup)
+        try:
+            if ttl is None:
+                await self._send(
+                    icmp_socket, lambda: icmp_socket.sock.sendto(packet, (address, 0))
+                )
+            else:
+                await self._send_with_ttl(icmp_socket, packet, address, ttl)
+        except BaseException:
+            future.cancel()
+            raise
+        return future
+
+    async def _send(self, icmp_socket: _IcmpSocket, send: Callable[[], object]) -> None:
+        """
+        Отправляет пакет с неблокирующего сокета, при переполненном буфере
+        ждет готовности сокета к записи.
+
+        Не использует loop.sock_sendto: в uvloop он не реализован.
+        """
+        while True:
+            try:
+                send()
+                return
+            except (BlockingIOError, InterruptedError):
+                await self._wait_writable(icmp_socket)
+
+    async def _wait_writable(self, icmp_socket: _IcmpSocket) -> None:
+        # на один дескриптор можно повесить только один writer,
+        # поэтому он общий для всех ждущих
+        waiter = self._loop.create_future()
+        if not icmp_socket.write_waiters:
+            self._loop.add_writer(
+                icmp_socket.sock.fileno(), self._on_writable, icmp_socket
+            )
+        icmp_socket.write_waiters.append(waiter)
+        await waiter
+
+    def _on_writable(self, icmp_socket: _IcmpSocket) -> None:
+        self._loop.remove_writer(icmp_socket.sock.fileno())
+        waiters, icmp_socket.write_waiters = icmp_socket.write_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _send_with_ttl(
+        self, icmp_socket: _IcmpSocket, packet: bytes, address: str, ttl: int
+    ) -> None:
+        # TTL передается в управляющем сообщении, чтобы не менять
+        # настройку общего сокета для остальных запросов
+        if icmp_socket.family == socket.AF_INET:
+            ancillary = [(socket.IPPROTO_IP, socket.IP_TTL, struct.pack("i", ttl))]
+        else:
+            ancillary = [
+                (socket.IPPROTO_IPV6, socket.IPV6_HOPLIMIT, struct.pack("i", ttl))
+            ]
+        await self._send(
+            icmp_socket,
+            lambda: icmp_socket.sock.sendmsg([packet], ancillary, 0, (address, 0)),
+        )
+
+    async def ping(
+        self, address: str, family: int, timeout: float, payload_size: int = 56
+    ) -> IcmpReply:
+        """
+        Отправляет один эхо-запрос и ждет ответ.
+
+        :raises TimeoutError: если ответ не получен за timeout
+        """
+        future = await self.send(address, family, timeout, payload_size)
+        return await future
+
+    async def close(self) -> None:
+        if self._loop is not None:
+            for icmp_socket in self._sockets.values():
+                self._loop.remove_reader(icmp_socket.sock.fileno())
+                self._loop.remove_writer(icmp_socket.sock.fileno())
+                icmp_socket.close()
+        self._sockets.clear()
+        self._loop = None
+
+
+_icmp_engine_instance: IcmpEngine | None = None
+
+
+def get_icmp_engine() -> IcmpEngine:
+    global _icmp_engine_instance
+    if _icmp_engine_instance is None:
+        _icmp_engine_instance = IcmpEngine(
+            socket_buffer=get_config().ICMP_SOCKET_BUFFER
+        )
+    return _icmp_engine_instance
@@ -0,0 +1,27 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Callable, Coroutine, TypeVar
+
+from netcheck_agent.config import get_config
+
+logger = getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def get_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """:return: фабрика uvloop, если он включен в конфиге и установлен"""
+    if not get_config().USE_UVLOOP:
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("uvloop is not installed, using the default asyncio loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """Аналог asyncio.run с выбором реализации event loop по конфигу."""
+    with asyncio.Runner(loop_factory=get_loop_factory()) as runner:
+        return runner.run(main)
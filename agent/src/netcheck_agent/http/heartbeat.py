@@ -1,11 +1,34 @@
 import aiohttp
 
+from netcheck_agent.schemas import AgentHeartbeat, AgentLoad
 
-async def send_heartbeat(heartbeat_endpoint: str, agent_id: str) -> None:
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            heartbeat_endpoint,
-            json={"agent_id": agent_id},
+HEARTBEAT_TIMEOUT = 10.0
+
+
+class HeartbeatSender:
+    """Отправляет heartbeat агента через одну HTTP сессию на все время работы."""
+
+    def __init__(self, heartbeat_endpoint: str, agent_id: str) -> None:
+        self.heartbeat_endpoint = heartbeat_endpoint
+        self.agent_id = agent_id
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=HEARTBEAT_TIMEOUT)
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def send(self, load: AgentLoad | None = None) -> None:
+        heartbeat = AgentHeartbeat(agent_id=self.agent_id, load=load)
+        async with self._session.post(
+            self.heartbeat_endpoint,
+            json=heartbeat.model_dump(mode="json"),
         ) as response:
             if response.status != 204:
                 raise Exception(f"Heartbeat failed with status code {response.status}")
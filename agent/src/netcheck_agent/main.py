@@ -1,25 +1,56 @@
 import asyncio
 import signal
+import weakref
 from functools import partial
 from logging import getLogger
+from multiprocessing.connection import Connection
+from typing import Callable
 from uuid import UUID
 
 import aio_pika
 from rmq_service import ConsumeService, ProduceService, QueueConfig
 
+from netcheck_agent import event_loop
+from netcheck_agent.checks import get_checker_registry
+from netcheck_agent.concurrency import ConcurrencyController
 from netcheck_agent.config import get_config
-from netcheck_agent.http.heartbeat import send_heartbeat
+from netcheck_agent.http.heartbeat import HeartbeatSender
 from netcheck_agent.http.registration import register_agent
 from netcheck_agent.logger import setup_logger
-from netcheck_agent.requests_handler import callback
-from netcheck_agent.schemas import RMQCredentials
+from netcheck_agent.metrics import get_metrics
+from netcheck_agent.pools import CheckPools
+from netcheck_agent.rate_limit import get_rate_limiter
+from netcheck_agent.requests_handler import (
+    ControlHandler,
+    ResponsePublisher,
+    callback,
+    produce_response,
+    run_subscription,
+)
+from netcheck_agent.response_batcher import ResponseBatcher
+from netcheck_agent.scheduler import CheckScheduler
+from netcheck_agent.schemas import (
+    AgentLoad,
+    RegistrationResponse,
+    RMQCredentials,
+)
+from netcheck_agent.spool import ResponseSpool
+from netcheck_agent.supervisor import ControlRelay, Supervisor, report_health
+from netcheck_agent.telemetry import get_load_stats
 
 setup_logger()
 
 logger = getLogger(__name__)
 
+# каналы RabbitMQ для публикации ответов сверх каналов обработчиков очереди
+PUBLISH_CHANNELS = 20
 
-def get_channel_pools(rmq_url: str):
+
+def get_channel_pools(
+    rmq_url: str,
+    channels: weakref.WeakSet | None = None,
+    max_channels: int = 100,
+):
     async def create_connection():
         return await aio_pika.connect_robust(rmq_url)
 
@@ -27,12 +58,26 @@ def get_channel_pools(rmq_url: str):
 
     async def create_channel():
         async with connection_pool.acquire() as connection:
-            return await connection.channel()
+            channel = await connection.channel()
+            if channels is not None:
+                channels.add(channel)
+            return channel
 
-    channel_pool = aio_pika.pool.Pool(create_channel, max_size=100)
+    channel_pool = aio_pika.pool.Pool(create_channel, max_size=max_channels)
     return connection_pool, channel_pool
 
 
+async def set_prefetch(channels: weakref.WeakSet, prefetch_count: int) -> None:
+    # global qos в RabbitMQ применяется сразу ко всем потребителям канала
+    for channel in list(channels):
+        if channel.is_closed:
+            continue
+        try:
+            await channel.set_qos(prefetch_count=prefetch_count, global_=True)
+        except Exception as e:
+            logger.warning(f"Failed to update prefetch: {e}")
+
+
 async def setup_producer(
     channel_pool, rmq_credentials: RMQCredentials
 ) -> ProduceService:
@@ -46,9 +91,12 @@ async def setup_producer(
 async def setup_consumer(
     channel_pool,
     rmq_credentials: RMQCredentials,
-    producer: ProduceService,
+    publish: ResponsePublisher,
     num_workers: int,
     agent_id: UUID,
+    controller: ConcurrencyController | None = None,
+    apply_control: ControlHandler | None = None,
+    pools: CheckPools | None = None,
 ) -> tuple[ConsumeService, list[asyncio.Task]]:
     consumer = ConsumeService(
         channel_pool=channel_pool,
@@ -61,53 +109,221 @@ async def setup_consumer(
 
     tasks = [
         asyncio.create_task(
-            consumer.consume(callback=partial(callback, producer, agent_id))
+            consumer.consume(
+                callback=partial(
+                    callback,
+                    publish,
+                    agent_id,
+                    controller=controller,
+                    apply_control=apply_control,
+                    pools=pools,
+                )
+            )
         )
         for _ in range(num_workers)
     ]
     return consumer, tasks
 
 
-async def heartbeat_loop(heartbeat_endpoint: str, agent_id: str, interval_sec: int):
+async def heartbeat_loop(
+    heartbeat: HeartbeatSender, interval_sec: int, get_load: Callable[[], AgentLoad]
+):
     while True:
         try:
-            await send_heartbeat(heartbeat_endpoint, agent_id)
+            await heartbeat.send(get_load())
             logger.debug("Heartbeat sent successfully")
         except Exception as e:
             logger.error(f"Heartbeat failed: {e}")
         await asyncio.sleep(interval_sec)
 
 
-async def main():
+async def run_agent(
+    register_response: RegistrationResponse,
+    health_conn: Connection | None = None,
+    worker_index: int = 0,
+    workers: int = 1,
+):
+    """
+    Обрабатывает запросы из очереди до сигнала остановки.
+
+    :param health_conn: канал к супервизору, если агент запущен воркером;
+        тогда heartbeat отправляет супервизор, а воркер сообщает ему о себе
+    :param worker_index: номер воркера из workers, определяет его долю подписок
+    """
     config = get_config()
-    try:
-        register_response = await register_agent()
-    except Exception:
-        logger.fatal("Agent registration failed", exc_info=True)
-        exit(-1)
 
+    # проверки сами запускают нужные им движки
+    checker_registry = get_checker_registry()
+    await checker_registry.start()
+
+    pools = None
+    if config.CHECK_POOLS_ENABLED:
+        pools = CheckPools(
+            limits=config.CHECK_POOL_LIMITS,
+            default_limit=config.NUM_WORKERS,
+            max_queued=config.CHECK_POOL_MAX_QUEUED,
+        )
+    # обработчик занят сообщением, пока проверка не выполнена, поэтому
+    # их должно хватать на все места в лимитах
+    if pools is not None:
+        # типы без проверки (INFO) обработчиков не занимают
+        num_consumers = pools.capacity(t.value for t in checker_registry.checker_types)
+    elif config.CONCURRENCY_ADAPTIVE:
+        num_consumers = config.CONCURRENCY_MAX
+    else:
+        num_consumers = config.NUM_WORKERS
+
+    channels = weakref.WeakSet()
+    # каждый обработчик держит свой канал, и публикации не должны ждать,
+    # пока они освободятся
     connection_pool, channel_pool = get_channel_pools(
-        register_response.rmq_credentials.RMQ_URL
+        register_response.rmq_credentials.RMQ_URL,
+        channels,
+        max_channels=num_consumers + PUBLISH_CHANNELS,
     )
     producer = await setup_producer(
         channel_pool=channel_pool,
         rmq_credentials=register_response.rmq_credentials,
     )
+    publish = partial(produce_response, producer)
+    spool = None
+    if config.SPOOL_ENABLED:
+        spool = ResponseSpool(
+            publish=publish,
+            # у каждого воркера своя очередь на диске
+            directory=f"{config.SPOOL_DIR}/worker-{worker_index}",
+            segment_bytes=config.SPOOL_SEGMENT_BYTES,
+            max_bytes=config.SPOOL_MAX_BYTES,
+            fsync_interval=config.SPOOL_FSYNC_INTERVAL,
+            publish_timeout=config.SPOOL_PUBLISH_TIMEOUT,
+        )
+        await spool.start()
+        publish = spool.publish
+    batcher = None
+    if config.RESPONSE_BATCH_ENABLED:
+        batcher = ResponseBatcher(
+            channel_pool=channel_pool,
+            routing_key=register_response.rmq_credentials.response_queue,
+            max_messages=config.RESPONSE_BATCH_MAX_MESSAGES,
+            max_bytes=config.RESPONSE_BATCH_MAX_BYTES,
+            flush_interval=config.RESPONSE_BATCH_FLUSH_INTERVAL,
+            fallback=spool.append if spool is not None else None,
+        )
+        publish = batcher.add
+        if spool is not None:
+            # пока очередь на диске не отправлена, новые ответы идут за ней
+            publish = partial(spool.forward, batcher.add)
+    controller = None
+    if config.CONCURRENCY_ADAPTIVE:
+        controller = ConcurrencyController(
+            min_limit=config.CONCURRENCY_MIN,
+            max_limit=config.CONCURRENCY_MAX,
+            initial_limit=config.NUM_WORKERS,
+            interval=config.CONCURRENCY_ADJUST_INTERVAL,
+            max_loop_lag=config.CONCURRENCY_MAX_LOOP_LAG,
+            max_timeout_rate=config.CONCURRENCY_MAX_TIMEOUT_RATE,
+            min_fd_headroom=config.CONCURRENCY_MIN_FD_HEADROOM,
+            on_change=partial(set_prefetch, channels),
+        )
+    scheduler = CheckScheduler(
+        run=partial(
+            run_subscription,
+            publish,
+            register_response.agent_id,
+            controller=controller,
+            pools=pools,
+        ),
+        shard_index=worker_index,
+        shard_count=workers,
+    )
+    await scheduler.start()
+    relay = None
+    apply_control = scheduler.apply
+    if health_conn is not None:
+        relay = ControlRelay(health_conn, scheduler)
+        await relay.start()
+        apply_control = relay.apply
     consumer, consume_tasks = await setup_consumer(
         channel_pool=channel_pool,
         rmq_credentials=register_response.rmq_credentials,
-        producer=producer,
-        num_workers=config.NUM_WORKERS,
+        publish=publish,
+        num_workers=num_consumers,
         agent_id=register_response.agent_id,
+        controller=controller,
+        apply_control=apply_control,
+        pools=pools,
     )
+    if controller is not None:
+        await set_prefetch(channels, controller.limit)
+        await controller.start()
+    elif pools is not None:
+        await set_prefetch(channels, num_consumers)
 
-    heartbeat_task = asyncio.create_task(
-        heartbeat_loop(
-            heartbeat_endpoint=register_response.heartbeat_endpoint,
-            agent_id=str(register_response.agent_id),
-            interval_sec=register_response.heartbeat_interval_sec,
+    load_stats = get_load_stats()
+    await load_stats.start()
+
+    metrics = None
+    if config.METRICS_ENABLED:
+        metrics = get_metrics()
+        metrics.add_gauge(
+            "netcheck_subscriptions",
+            "Active check subscriptions.",
+            lambda: len(scheduler),
+        )
+        if controller is not None:
+            metrics.add_gauge(
+                "netcheck_concurrency_limit",
+                "Current adaptive concurrency limit.",
+                lambda: controller.limit,
+            )
+            metrics.add_gauge(
+                "netcheck_checks_queued",
+                "Checks waiting for a concurrency slot.",
+                lambda: controller.queued,
+            )
+        if spool is not None:
+            metrics.add_gauge(
+                "netcheck_spooled_responses",
+                "Responses waiting in the disk spool.",
+                lambda: spool.pending_records,
+            )
+        if config.RATE_LIMIT_ENABLED:
+            metrics.add_gauge(
+                "netcheck_rate_limited_targets",
+                "Hosts with tracked rate limit state.",
+                lambda: len(get_rate_limiter()),
+            )
+        # у каждого воркера свой порт
+        await metrics.start_server(
+            config.METRICS_HOST, config.METRICS_PORT + worker_index
+        )
+
+    def current_load() -> AgentLoad:
+        queued = controller.queued if controller is not None else 0
+        if pools is not None:
+            queued += pools.queued
+        return load_stats.gauges(
+            queued=queued,
+            spooled=spool.pending_records if spool is not None else 0,
+        )
+
+    heartbeat = None
+    if health_conn is None:
+        heartbeat = HeartbeatSender(
+            register_response.heartbeat_endpoint, str(register_response.agent_id)
+        )
+        await heartbeat.start()
+        heartbeat_task = asyncio.create_task(
+            heartbeat_loop(
+                heartbeat=heartbeat,
+                interval_sec=register_response.heartbeat_interval_sec,
+                get_load=lambda: load_stats.snapshot(current_load()),
+            )
+        )
+    else:
+        heartbeat_task = asyncio.create_task(
+            report_health(health_conn, current_load, load_stats)
         )
-    )
 
     stop_event = asyncio.Event()
 
@@ -124,6 +340,11 @@ async def main():
     await stop_event.wait()
 
     consumer.stop()
+    if relay is not None:
+        await relay.close()
+    await scheduler.close()
+    if controller is not None:
+        await controller.close()
     for i in consume_tasks:
         i.cancel()
     heartbeat_task.cancel()
@@ -133,12 +354,36 @@ async def main():
         logger.info("Consumer task cancelled")
     except NotImplementedError:
         logger.warning("Signal handlers are not supported on this platform")
+    if heartbeat is not None:
+        await heartbeat.close()
+    await load_stats.close()
+    if metrics is not None:
+        await metrics.close()
 
+    if batcher is not None:
+        await batcher.close()
+    if spool is not None:
+        await spool.close()
     await channel_pool.close()
     await connection_pool.close()
+    await checker_registry.close()
 
     logger.info("Shutdown complete")
 
 
+async def main():
+    config = get_config()
+    try:
+        register_response = await register_agent()
+    except Exception:
+        logger.fatal("Agent registration failed", exc_info=True)
+        exit(-1)
+
+    if config.AGENT_PROCESSES > 1:
+        await Supervisor(register_response, config.AGENT_PROCESSES).run()
+    else:
+        await run_agent(register_response)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    event_loop.run(main())
@@ -0,0 +1,198 @@
+import bisect
+from logging import getLogger
+from typing import Callable
+
+from aiohttp import web
+
+logger = getLogger(__name__)
+
+# границы корзин гистограмм, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self, kind: str = "counter") -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {kind}"]
+        values = self.values or ({} if self.labels else {(): 0})
+        for labels, value in values.items():
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+    def dec(self, *labels: str, value: float = 1) -> None:
+        self.inc(*labels, value=-value)
+
+    def render(self, kind: str = "gauge") -> list[str]:
+        return super().render(kind)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами, наблюдение - бинарный поиск."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...],
+        labels: tuple[str, ...] = (),
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # по каждому набору меток: число наблюдений в корзинах (+Inf последней), сумма
+        self.values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}"
+                )
+            label_str = _labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_str} {total[0]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class AgentMetrics:
+    """
+    Метрики агента в текстовом формате Prometheus.
+
+    Обновляются из обработчиков проверок без блокировок: все изменения
+    идут из одного event loop. Значения, которые удобнее читать в момент
+    запроса (лимит конкурентности, очередь на диске), добавляются через
+    add_gauge.
+    """
+
+    def __init__(self) -> None:
+        self.checks = Counter(
+            "netcheck_checks_total",
+            "Completed checks by request type and outcome.",
+            ("request_type", "outcome"),
+        )
+        self.check_duration = Histogram(
+            "netcheck_check_duration_seconds",
+            "Check duration by request type.",
+            DURATION_BUCKETS,
+            ("request_type",),
+        )
+        self.in_flight = Gauge(
+            "netcheck_checks_in_flight",
+            "Checks currently running by request type.",
+            ("request_type",),
+        )
+        self.publish_failures = Counter(
+            "netcheck_publish_failures_total", "Failed response publishes."
+        )
+        self.consume_lag = Histogram(
+            "netcheck_consume_lag_seconds",
+            "Time from request creation on the backend to check start.",
+            LAG_BUCKETS,
+            ("request_type",),
+        )
+        self.pool_limit = Gauge(
+            "netcheck_pool_limit",
+            "Concurrency limit of the check pool.",
+            ("pool",),
+        )
+        self.pool_queued = Gauge(
+            "netcheck_pool_queued",
+            "Admitted checks waiting for a slot in the pool.",
+            ("pool",),
+        )
+        self.pool_wait = Histogram(
+            "netcheck_pool_wait_seconds",
+            "Time from admission to check start in the pool.",
+            DURATION_BUCKETS,
+            ("pool",),
+        )
+        self._gauges: list[tuple[str, str, Callable[[], float]]] = []
+        self._runner: web.AppRunner | None = None
+
+    def add_gauge(self, name: str, help: str, read: Callable[[], float]) -> None:
+        self._gauges.append((name, help, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.checks,
+            self.check_duration,
+            self.in_flight,
+            self.publish_failures,
+            self.consume_lag,
+            self.pool_limit,
+            self.pool_queued,
+            self.pool_wait,
+        ):
+            lines.extend(metric.render())
+        for name, help, read in self._gauges:
+            try:
+                value = read()
+            except Exception:
+                logger.debug(f"Failed to read gauge {name}", exc_info=True)
+                continue
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} gauge"])
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=self.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    async def start_server(self, host: str, port: int) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Metrics listener started on {host}:{port}")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+_metrics_instance: AgentMetrics | None = None
+
+
+def get_metrics() -> AgentMetrics:
+    global _metrics_instance
+    if _metrics_instance is None:
+        _metrics_instance = AgentMetrics()
+    return _metrics_instance
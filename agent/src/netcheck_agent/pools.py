@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Any, Coroutine, Iterable
+
+from netcheck_agent.metrics import get_metrics
+
+
+class _Pool:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+
+
+class CheckPools:
+    """
+    Отдельные лимиты одновременных проверок для каждого типа проверки.
+
+    Обработчик сообщения ждет места в пуле своего типа, а затем и самой
+    проверки, поэтому сообщение подтверждается только после публикации
+    ответа, а пока места нет, новые сообщения остаются в RabbitMQ.
+    Обработчиков очереди запускается capacity: сумма лимитов всех пулов и
+    max_queued. Пока ждущих места проверок не больше max_queued,
+    медленные проверки одного типа не задерживают остальные типы. Более
+    длинный хвост одного типа приостанавливает чтение очереди, но
+    сообщения при этом не теряются и не отклоняются. Типы без заданного
+    лимита получают default_limit.
+    """
+
+    def __init__(
+        self, limits: dict[str, int], default_limit: int, max_queued: int
+    ) -> None:
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_queued = max_queued
+        self._pools: dict[str, _Pool] = {}
+
+    @property
+    def queued(self) -> int:
+        """Число проверок, ждущих места в своем пуле."""
+        return sum(pool.waiting for pool in self._pools.values())
+
+    def capacity(self, request_types: Iterable[str]) -> int:
+        """Сколько обработчиков очереди нужно, чтобы пулы не мешали друг другу."""
+        limits = (self.limits.get(t, self.default_limit) for t in request_types)
+        return sum(limits) + self.max_queued
+
+    async def run(self, request_type: str, check: Coroutine[Any, Any, Any]) -> None:
+        """Ждет места в пуле типа проверки и выполняет ее."""
+        pool = self._pool(request_type)
+        metrics = get_metrics()
+        started = time.perf_counter()
+        pool.waiting += 1
+        metrics.pool_queued.inc(request_type)
+        try:
+            await pool.semaphore.acquire()
+        except BaseException:
+            check.close()
+            raise
+        finally:
+            pool.waiting -= 1
+            metrics.pool_queued.dec(request_type)
+        metrics.pool_wait.observe(time.perf_counter() - started, request_type)
+        try:
+            await check
+        finally:
+            pool.semaphore.release()
+
+    def _pool(self, request_type: str) -> _Pool:
+        pool = self._pools.get(request_type)
+        if pool is None:
+            limit = self.limits.get(request_type, self.default_limit)
+            pool = self._pools[request_type] = _Pool(limit)
+            get_metrics().pool_limit.set(request_type, value=limit)
+        return pool
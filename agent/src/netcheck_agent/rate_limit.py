@@ -0,0 +1,135 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+from pydantic import ValidationError
+
+from netcheck_agent.checks.schemas import PingOptions
+from netcheck_agent.config import get_config
+from netcheck_agent.schemas import CheckRequest, RequestType
+
+# как часто удалять корзины хостов, к которым давно не обращались
+SWEEP_INTERVAL = 10.0
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+
+def target_host(request: CheckRequest) -> str:
+    return urlparse(request.host).hostname or request.host
+
+
+def request_cost(request: CheckRequest) -> int:
+    """Сколько токенов расходует запрос: PING - по одному на пакет."""
+    if request.request_type != RequestType.PING:
+        return 1
+    try:
+        return PingOptions.model_validate(request.options).count
+    except ValidationError:
+        # некорректные параметры отклонит сама проверка
+        return 1
+
+
+class TargetRateLimiter:
+    """
+    Ограничение частоты проверок одного хоста (token bucket).
+
+    Бюджет отдельный для каждой пары (тип проверки, хост): rates задает
+    число проверок в секунду по типам, burst - сколько проверок подряд
+    можно выполнить без ожидания. Типы без лимита не ограничиваются.
+    Запрос сверх лимита ждет своей очереди, если ждать не дольше
+    max_wait, иначе отклоняется. Токены резервируются сразу (счетчик
+    уходит в минус), поэтому ожидающие запросы обслуживаются по порядку.
+    Запрос может расходовать несколько токенов (см. request_cost); если
+    их больше burst, он ждет полной корзины и уводит ее в минус, так что
+    средняя частота все равно соблюдается.
+
+    Хранятся только корзины хостов, к которым обращались за последние
+    idle_timeout секунд или которые еще не восполнились.
+    """
+
+    def __init__(
+        self,
+        rates: dict[str, float],
+        burst: int,
+        max_wait: float,
+        idle_timeout: float,
+    ) -> None:
+        self.rates = rates
+        self.burst = burst
+        self.max_wait = max_wait
+        self.idle_timeout = idle_timeout
+        self._buckets: dict[tuple[str, str], _Bucket] = {}
+        self._last_sweep = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def acquire(self, request: CheckRequest, tokens: int = 1) -> bool:
+        """:return: False, если запрос превышает лимит хоста"""
+        request_type = request.request_type.value
+        rate = self.rates.get(request_type)
+        if not rate:
+            return True
+
+        now = time.monotonic()
+        if now - self._last_sweep >= SWEEP_INTERVAL:
+            self._sweep(now)
+        key = (request_type, target_host(request))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.burst, now)
+        else:
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * rate
+            )
+            bucket.updated = now
+
+        required = min(tokens, self.burst)
+        if bucket.tokens >= required:
+            bucket.tokens -= tokens
+            return True
+        wait = (required - bucket.tokens) / rate
+        if wait > self.max_wait:
+            return False
+        bucket.tokens -= tokens
+        await asyncio.sleep(wait)
+        return True
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        # корзина удаляется, только когда снова заполнилась, иначе
+        # пересоздание сбросило бы ограничение
+        idle = [
+            key
+            for key, bucket in self._buckets.items()
+            if now - bucket.updated >= self.idle_timeout
+            and bucket.tokens + (now - bucket.updated) * self.rates[key[0]]
+            >= self.burst
+        ]
+        for key in idle:
+            del self._buckets[key]
+
+
+_rate_limiter_instance: TargetRateLimiter | None = None
+
+
+def get_rate_limiter() -> TargetRateLimiter:
+    global _rate_limiter_instance
+    if _rate_limiter_instance is None:
+        config = get_config()
+        # у каждого процесса агента свой лимитер, поэтому лимит агента
+        # делится между ними поровну
+        processes = max(config.AGENT_PROCESSES, 1)
+        _rate_limiter_instance = TargetRateLimiter(
+            rates={t: rate / processes for t, rate in config.RATE_LIMITS.items()},
+            burst=max(config.RATE_LIMIT_BURST // processes, 1),
+            max_wait=config.RATE_LIMIT_MAX_WAIT,
+            idle_timeout=config.RATE_LIMIT_IDLE_TIMEOUT,
+        )
+    return _rate_limiter_instance
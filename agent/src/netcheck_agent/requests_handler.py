@@ -1,46 +1,230 @@
+import asyncio
+import datetime
+import time
+from functools import partial
 from logging import getLogger
-from uuid import UUID
+from typing import Awaitable, Callable
+from uuid import UUID, uuid4
 
 from rmq_service import Message, ProduceService
 
-from netcheck_agent.checks import (
-    BaseChecker,
-    DnsChecker,
-    HttpChecker,
-    PingChecker,
-    TcpChecker,
+from netcheck_agent.checks import BaseChecker, get_checker_registry
+from netcheck_agent.coalescing import get_check_coalescer
+from netcheck_agent.codec import decode_message, encode_response
+from netcheck_agent.concurrency import ConcurrencyController
+from netcheck_agent.config import get_config
+from netcheck_agent.metrics import get_metrics
+from netcheck_agent.pools import CheckPools
+from netcheck_agent.rate_limit import get_rate_limiter, request_cost
+from netcheck_agent.schemas import (
+    CheckRequestRMQ,
+    CheckResponse,
+    CheckSubscription,
+    SubscriptionControl,
 )
-from netcheck_agent.schemas import CheckRequestRMQ, CheckResponseRMQ, RequestType
+from netcheck_agent.telemetry import get_load_stats
 
-checkers: dict[RequestType, type[BaseChecker]] = {
-    RequestType.HTTP: HttpChecker,
-    RequestType.DNS: DnsChecker,
-    RequestType.PING: PingChecker,
-    RequestType.TCP_CONNECT: TcpChecker,
-}
+logger = getLogger(__name__)
 
+ResponsePublisher = Callable[[bytes], Awaitable[None]]
+ControlHandler = Callable[[SubscriptionControl], None]
 
-logger = getLogger(__name__)
+EXPIRED_ERROR = "expired"
+DEADLINE_ERROR = "Deadline exceeded"
+RATE_LIMITED_ERROR = "rate_limited"
+
+
+async def produce_response(producer: ProduceService, body: bytes) -> None:
+    """Публикует ответ отдельным сообщением."""
+    await producer.produce(Message(body=body))
 
 
-async def callback(producer: ProduceService, agent_id: UUID, data: bytes, **kwargs):
+async def callback(
+    publish: ResponsePublisher,
+    agent_id: UUID,
+    data: bytes,
+    controller: ConcurrencyController | None = None,
+    apply_control: ControlHandler | None = None,
+    pools: CheckPools | None = None,
+    **kwargs,
+):
     logger.info(f"Received request: {data.decode()}")
 
-    request = CheckRequestRMQ.model_validate_json(data)
+    request = decode_message(data)
+    if isinstance(request, SubscriptionControl):
+        if apply_control is None:
+            logger.warning("Subscriptions are not supported, control message skipped")
+        else:
+            apply_control(request)
+        return
 
-    checker = checkers.get(request.request_type)
+    checker = get_checker_registry().get(request.request_type)
     if not checker:
         logger.error(f"Unsupported request type: {request.request_type}")
         return
-    checker_instance = checker()
-    response = await checker_instance.check(request)
-    response_rmq = CheckResponseRMQ(
-        success=response.success,
-        request_id=request.request_id,
-        result=response.result,
-        error=response.error,
-        latency_ms=response.latency_ms,
-        timestamp=response.timestamp,
-        agent_id=agent_id,
+    await _start(checker, request, publish, agent_id, None, controller, pools)
+
+
+async def run_subscription(
+    publish: ResponsePublisher,
+    agent_id: UUID,
+    subscription: CheckSubscription,
+    controller: ConcurrencyController | None = None,
+    pools: CheckPools | None = None,
+):
+    """Выполняет очередной запуск подписки и ждет его завершения."""
+    checker = get_checker_registry().get(subscription.request_type)
+    if not checker:
+        logger.error(f"Unsupported request type: {subscription.request_type}")
+        return
+    now = _now()
+    # результат нужен не позже следующего запуска
+    request = CheckRequestRMQ(
+        request_id=uuid4(),
+        request_type=subscription.request_type,
+        host=subscription.host,
+        port=subscription.port,
+        options=subscription.options,
+        created_at=now,
+        deadline=now + datetime.timedelta(seconds=subscription.interval_sec),
+    )
+    await _start(
+        checker,
+        request,
+        publish,
+        agent_id,
+        subscription.subscription_id,
+        controller,
+        pools,
     )
-    await producer.produce(Message.from_json(response_rmq.model_dump(mode="json")))
+
+
+async def _start(
+    checker: BaseChecker,
+    request: CheckRequestRMQ,
+    publish: ResponsePublisher,
+    agent_id: UUID,
+    subscription_id: UUID | None,
+    controller: ConcurrencyController | None,
+    pools: CheckPools | None,
+) -> None:
+    """
+    Выполняет проверку с учетом лимитов.
+
+    Возвращает управление только после публикации ответа, чтобы
+    сообщение подтверждалось после выполнения проверки.
+    """
+    check = _check_and_publish(checker, request, publish, agent_id, subscription_id)
+    if controller is not None:
+        check = _spawn_and_wait(controller, check)
+    if pools is None:
+        await check
+    else:
+        # место в общем лимите занимается уже после места в пуле
+        await pools.run(request.request_type.value, check)
+
+
+async def _spawn_and_wait(
+    controller: ConcurrencyController, check: Awaitable[CheckResponse]
+) -> None:
+    await (await controller.spawn(check))
+
+
+async def _check_and_publish(
+    checker: BaseChecker,
+    request: CheckRequestRMQ,
+    publish: ResponsePublisher,
+    agent_id: UUID,
+    subscription_id: UUID | None = None,
+) -> CheckResponse:
+    request_type = request.request_type.value
+    metrics = get_metrics()
+    load_stats = get_load_stats()
+    if request.created_at is not None and subscription_id is None:
+        consume_lag = _now() - _as_utc(request.created_at)
+        metrics.consume_lag.observe(consume_lag.total_seconds(), request_type)
+    metrics.in_flight.inc(request_type)
+    load_stats.check_started()
+    started = time.perf_counter()
+    response = None
+    try:
+        response = await _run_check(checker, request)
+    finally:
+        metrics.in_flight.dec(request_type)
+        metrics.check_duration.observe(time.perf_counter() - started, request_type)
+        metrics.checks.inc(request_type, _outcome(response))
+        load_stats.check_finished(response is not None and response.success)
+    body = encode_response(response, request.request_id, agent_id, subscription_id)
+    try:
+        await publish(body)
+    except Exception:
+        metrics.publish_failures.inc()
+        raise
+    return response
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC)
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.UTC)
+
+
+def _outcome(response: CheckResponse | None) -> str:
+    if response is None:
+        return "error"
+    if response.success:
+        return "success"
+    if response.error == EXPIRED_ERROR:
+        return "expired"
+    if response.error == RATE_LIMITED_ERROR:
+        return "rate_limited"
+    if response.timed_out:
+        return "timeout"
+    return "failure"
+
+
+async def _run_check(checker: BaseChecker, request: CheckRequestRMQ) -> CheckResponse:
+    """Выполняет проверку, не выходя за срок запроса, если он задан."""
+    if request.deadline is None:
+        return await _check(checker, request)
+
+    remaining = (_as_utc(request.deadline) - _now()).total_seconds()
+    if remaining <= 0:
+        # результат уже никто не ждет: подтверждаем запрос, не выполняя его
+        logger.info(f"Request {request.request_id} expired, skipping")
+        return CheckResponse(
+            success=False,
+            error=EXPIRED_ERROR,
+            timestamp=_now(),
+        )
+    try:
+        async with asyncio.timeout(remaining):
+            return await _check(checker, request)
+    except TimeoutError:
+        return CheckResponse(
+            success=False,
+            error=DEADLINE_ERROR,
+            timed_out=True,
+            timestamp=_now(),
+        )
+
+
+async def _check(checker: BaseChecker, request: CheckRequestRMQ) -> CheckResponse:
+    run = partial(_limited_check, checker, request)
+    if get_config().CHECK_COALESCING_ENABLED:
+        return await get_check_coalescer().check(request, run)
+    return await run()
+
+
+async def _limited_check(
+    checker: BaseChecker, request: CheckRequestRMQ
+) -> CheckResponse:
+    # объединенные проверки расходуют лимит хоста один раз
+    if get_config().RATE_LIMIT_ENABLED and not await get_rate_limiter().acquire(
+        request, request_cost(request)
+    ):
+        logger.debug(f"Request {request.request_id} to {request.host} rate limited")
+        return CheckResponse(success=False, error=RATE_LIMITED_ERROR, timestamp=_now())
+    return await checker.check(request)
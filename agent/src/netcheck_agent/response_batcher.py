@@ -0,0 +1,122 @@
+import asyncio
+from logging import getLogger
+from typing import Callable
+
+import aio_pika
+
+from netcheck_agent.metrics import get_metrics
+
+logger = getLogger(__name__)
+
+# сколько пачек может одновременно ждать подтверждения брокера,
+# следующие пачки ждут своей очереди на публикацию
+MAX_INFLIGHT_BATCHES = 8
+
+_ENVELOPE_START = b'{"responses": ['
+_ENVELOPE_SEPARATOR = b", "
+_ENVELOPE_END = b"]}"
+
+
+class ResponseBatcher:
+    """
+    Собирает ответы проверок в одно сообщение-конверт
+    `{"responses": [...]}`.
+
+    Пачка отправляется, когда набирает max_messages ответов или max_bytes
+    байт, либо через flush_interval после первого ответа в ней. Публикация
+    идет через канал с подтверждениями, пачка считается отправленной
+    только после ack брокера, и add возвращает управление только тогда,
+    поэтому запрос подтверждается после публикации ответа. Ответы пачки,
+    которую не удалось опубликовать, передаются в fallback, если он задан,
+    иначе ошибка публикации выбрасывается из add каждого ответа пачки.
+    """
+
+    def __init__(
+        self,
+        channel_pool: aio_pika.pool.Pool,
+        routing_key: str,
+        max_messages: int,
+        max_bytes: int,
+        flush_interval: float,
+        fallback: Callable[[bytes], None] | None = None,
+    ) -> None:
+        self.channel_pool = channel_pool
+        self.routing_key = routing_key
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.fallback = fallback
+
+        self._bodies: list[bytes] = []
+        self._size = 0
+        # завершается, когда текущая пачка опубликована
+        self._published: asyncio.Future | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._inflight = asyncio.Semaphore(MAX_INFLIGHT_BATCHES)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def add(self, body: bytes) -> None:
+        """Добавляет JSON ответа в текущую пачку и ждет ее публикации."""
+        if not self._bodies:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._flush)
+            self._published = loop.create_future()
+        published = self._published
+        self._bodies.append(body)
+        self._size += len(body) + len(_ENVELOPE_SEPARATOR)
+        if len(self._bodies) >= self.max_messages or self._size >= self.max_bytes:
+            self._flush()
+        # отмена одного обработчика не должна отменять ожидание всей пачки
+        await asyncio.shield(published)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._bodies:
+            return
+        bodies, self._bodies, self._size = self._bodies, [], 0
+        published, self._published = self._published, None
+        task = asyncio.create_task(self._publish(bodies, published))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _publish(self, bodies: list[bytes], published: asyncio.Future) -> None:
+        payload = _ENVELOPE_START + _ENVELOPE_SEPARATOR.join(bodies) + _ENVELOPE_END
+        async with self._inflight:
+            try:
+                async with self.channel_pool.acquire() as channel:
+                    await channel.default_exchange.publish(
+                        aio_pika.Message(
+                            body=payload,
+                            content_type="application/json",
+                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                        ),
+                        routing_key=self.routing_key,
+                    )
+            except Exception as e:
+                logger.error(
+                    f"Failed to publish batch of {len(bodies)} responses",
+                    exc_info=True,
+                )
+                if self.fallback is None:
+                    # ошибку получат обработчики, и запросы не будут подтверждены
+                    published.set_exception(e)
+                    # если все обработчики отменены, ошибку никто не заберет
+                    published.exception()
+                    return
+                get_metrics().publish_failures.inc()
+                try:
+                    for body in bodies:
+                        self.fallback(body)
+                except Exception as fallback_error:
+                    published.set_exception(fallback_error)
+                    published.exception()
+                    return
+            published.set_result(None)
+
+    async def close(self) -> None:
+        """Отправляет накопленные ответы и ждет подтверждения всех пачек."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import itertools
+import math
+import random
+from logging import getLogger
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from netcheck_agent.schemas import CheckSubscription, SubscriptionControl
+
+logger = getLogger(__name__)
+
+SubscriptionRunner = Callable[[CheckSubscription], Awaitable[None]]
+
+
+def _phase(subscription_id: UUID) -> float:
+    """Доля интервала, на которую сдвинут первый запуск подписки."""
+    return (subscription_id.int % 1_000_000) / 1_000_000
+
+
+class _Entry:
+    def __init__(self, subscription: CheckSubscription, base: float) -> None:
+        self.subscription = subscription
+        # плановое время запуска без jitter
+        self.base = base
+        # номер актуальной записи в куче, остальные записи устарели
+        self.seq = -1
+        self.task: asyncio.Task | None = None
+
+
+class CheckScheduler:
+    """
+    Запускает проверки подписок по расписанию.
+
+    Время следующих запусков хранится в куче, на ее вершину взведен один
+    таймер event loop, поэтому ожидание не зависит от числа подписок.
+    Первый запуск сдвигается на долю интервала, зависящую от id подписки,
+    и подписки с одинаковым интервалом равномерно распределяются по нему.
+    Расписание не зависит от длительности проверок: если к следующему
+    запуску проверка подписки еще идет, запуск пропускается.
+
+    Подписки хранятся в памяти процесса и не зависят от подключения к
+    RabbitMQ. При нескольких процессах агента управляющее сообщение
+    получает один из воркеров, а супервизор пересылает его всем
+    остальным. Каждый воркер ведет только свою долю подписок (shard_index
+    из shard_count).
+    """
+
+    def __init__(
+        self, run: SubscriptionRunner, shard_index: int = 0, shard_count: int = 1
+    ) -> None:
+        self.run = run
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+        self._entries: dict[UUID, _Entry] = {}
+        self._heap: list[tuple[float, int, UUID]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._started = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._started = True
+        self._arm()
+
+    async def close(self) -> None:
+        """Останавливает расписание и прерывает идущие запуски."""
+        self._started = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def owns(self, subscription_id: UUID) -> bool:
+        return subscription_id.int % self.shard_count == self.shard_index
+
+    def apply(self, control: SubscriptionControl) -> None:
+        """Применяет управляющее сообщение подписок."""
+        self._loop = asyncio.get_running_loop()
+        if control.action == "unsubscribe":
+            for subscription_id in control.subscription_ids:
+                self._entries.pop(subscription_id, None)
+        else:
+            subscriptions = [
+                s for s in control.subscriptions if self.owns(s.subscription_id)
+            ]
+            for subscription in subscriptions:
+                self._upsert(subscription)
+            if control.action == "sync":
+                actual = {s.subscription_id for s in subscriptions}
+                for subscription_id in self._entries.keys() - actual:
+                    del self._entries[subscription_id]
+        self._arm()
+        logger.info(
+            f"Subscriptions {control.action} applied, active: {len(self._entries)}"
+        )
+
+    def _upsert(self, subscription: CheckSubscription) -> None:
+        now = self._loop.time()
+        interval = subscription.interval_sec
+        entry = self._entries.get(subscription.subscription_id)
+        if entry is None:
+            base = now + _phase(subscription.subscription_id) * interval
+            entry = _Entry(subscription, base)
+            self._entries[subscription.subscription_id] = entry
+        elif entry.subscription == subscription:
+            # повтор при синхронизации не сбивает расписание
+            return
+        else:
+            entry.subscription = subscription
+            entry.base = min(entry.base, now + interval)
+        self._push(entry)
+
+    def _push(self, entry: _Entry) -> None:
+        jitter = entry.subscription.jitter_sec
+        when = entry.base + (random.uniform(0, jitter) if jitter else 0)
+        entry.seq = next(self._seq)
+        heapq.heappush(
+            self._heap, (when, entry.seq, entry.subscription.subscription_id)
+        )
+
+    def _arm(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # записи удаленных и обновленных подписок убираются, когда доходят до вершины
+        while self._heap and not self._is_actual(self._heap[0]):
+            heapq.heappop(self._heap)
+        if self._started and self._heap:
+            self._timer = self._loop.call_at(self._heap[0][0], self._on_timer)
+
+    def _is_actual(self, item: tuple[float, int, UUID]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry.seq == item[1]
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        now = self._loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            item = heapq.heappop(self._heap)
+            if not self._is_actual(item):
+                continue
+            entry = self._entries[item[2]]
+            self._launch(entry)
+            interval = entry.subscription.interval_sec
+            entry.base += interval
+            if entry.base <= now:
+                # пропущенные из-за занятого event loop запуски не наверстываются
+                entry.base += (math.floor((now - entry.base) / interval) + 1) * interval
+            self._push(entry)
+        self._arm()
+
+    def _launch(self, entry: _Entry) -> None:
+        subscription = entry.subscription
+        if entry.task is not None and not entry.task.done():
+            logger.debug(
+                f"Subscription {subscription.subscription_id} is still running, "
+                f"run skipped"
+            )
+            return
+        task = self._loop.create_task(self._run_once(subscription))
+        entry.task = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_once(self, subscription: CheckSubscription) -> None:
+        try:
+            await self.run(subscription)
+        except Exception:
+            logger.error(
+                f"Subscription {subscription.subscription_id} run failed",
+                exc_info=True,
+            )
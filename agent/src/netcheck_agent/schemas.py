@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, field_serializer, model_validator
+from pydantic import BaseModel, Field, field_serializer, field_validator
 
 
 class RMQCredentials(BaseModel):
@@ -38,6 +39,24 @@ class RegistrationResponse(BaseModel):
     heartbeat_endpoint: str
 
 
+class AgentLoad(BaseModel):
+    """Срез нагрузки агента для heartbeat."""
+
+    in_flight: int = 0
+    # проверки, ждущие свободного места, и ответы в очереди на диске
+    queued: int = 0
+    spooled: int = 0
+    loop_lag_ms: float = 0
+    checks_per_sec: float = 0
+    error_rate: float = 0
+    open_fds: int | None = None
+
+
+class AgentHeartbeat(BaseModel):
+    agent_id: UUID
+    load: AgentLoad | None = None
+
+
 class RequestType(str, Enum):
     INFO = "INFO"
     PING = "PING"
@@ -45,29 +64,60 @@ class RequestType(str, Enum):
     TCP_CONNECT = "TCP_CONNECT"
     UDP_CONNECT = "UDP_CONNECT"
     DNS = "DNS"
+    TRACEROUTE = "TRACEROUTE"
 
 
 class CheckRequest(BaseModel):
     request_type: RequestType
     host: str
     port: int | None
+    options: dict = Field(default_factory=dict)
 
-    @model_validator(mode="before")
-    def ensure_scheme(cls, values):
-        host = values.get("host")
+    @field_validator("host")
+    @classmethod
+    def ensure_scheme(cls, host: str) -> str:
+        # валидатор поля, а не модели: так model_validate_json разбирает
+        # сообщение целиком в pydantic-core, без промежуточного dict
         if host and not (host.startswith("http://") or host.startswith("https://")):
-            values["host"] = f"http://{host}"
-        return values
+            return f"http://{host}"
+        return host
 
 
 class CheckRequestRMQ(CheckRequest):
     request_id: UUID
+    created_at: datetime | None = None
+    deadline: datetime | None = None
+
+
+class CheckSubscription(CheckRequest):
+    """Проверка, которую агент сам повторяет с заданным интервалом."""
+
+    subscription_id: UUID
+    interval_sec: float = Field(gt=0)
+    # случайная задержка каждого запуска, от 0 до jitter_sec
+    jitter_sec: float = Field(default=0, ge=0)
+
+
+class SubscriptionControl(BaseModel):
+    """
+    Управляющее сообщение подписок.
+
+    subscribe добавляет или обновляет подписки, unsubscribe удаляет
+    subscription_ids, sync передает полный список подписок агента.
+    """
+
+    action: Literal["subscribe", "unsubscribe", "sync"]
+    subscriptions: list[CheckSubscription] = Field(default_factory=list)
+    subscription_ids: list[UUID] = Field(default_factory=list)
 
 
 class CheckResponseBase(BaseModel):
     success: bool
     error: str | None = None
     result: BaseModel | None = None
+    # проверка не уложилась в таймаут; выставляется самой проверкой и
+    # на бекенд не отправляется
+    timed_out: bool = Field(default=False, exclude=True)
 
     @field_serializer("result")
     def serialize_result(self, result: BaseModel | None, info):
@@ -81,8 +131,11 @@ class CheckResponseBase(BaseModel):
 class CheckResponse(CheckResponseBase):
     latency_ms: float | None = None
     timestamp: datetime
+    # результат получен вместе с одинаковым запросом, пришедшим раньше
+    coalesced: bool = False
 
 
 class CheckResponseRMQ(CheckResponse):
     request_id: UUID
     agent_id: UUID
+    subscription_id: UUID | None = None
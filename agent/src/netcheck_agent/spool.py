@@ -0,0 +1,242 @@
+import asyncio
+import os
+import struct
+from collections import deque
+from logging import getLogger
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from netcheck_agent.metrics import get_metrics
+
+logger = getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+_SUFFIX = ".spool"
+RETRY_DELAY_MIN = 1.0
+RETRY_DELAY_MAX = 30.0
+
+
+class _Segment:
+    def __init__(self, path: Path, size: int = 0, records: int = 0) -> None:
+        self.path = path
+        self.size = size
+        self.records = records
+        # записи, уже отправленные из этого сегмента
+        self.sent = 0
+        self.evicted = False
+
+
+def _scan(path: Path) -> tuple[int, int]:
+    """:return: размер целых записей сегмента и их число"""
+    size = records = 0
+    with open(path, "rb") as f:
+        while header := f.read(_HEADER.size):
+            if len(header) < _HEADER.size:
+                break
+            (length,) = _HEADER.unpack(header)
+            f.seek(length, os.SEEK_CUR)
+            if f.tell() > os.fstat(f.fileno()).st_size:
+                break
+            size = f.tell()
+            records += 1
+    return size, records
+
+
+def _sync_and_close(file) -> None:
+    os.fsync(file.fileno())
+    file.close()
+
+
+def _read_records(path: Path, size: int) -> list[bytes]:
+    with open(path, "rb") as f:
+        data = f.read(size)
+    records = []
+    offset = 0
+    while offset < len(data):
+        (length,) = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        records.append(data[offset : offset + length])
+        offset += length
+    return records
+
+
+class ResponseSpool:
+    """
+    Локальная очередь ответов на диске на время недоступности RabbitMQ.
+
+    Ответ, который не удалось опубликовать (ошибка или таймаут публикации),
+    дописывается в конец текущего сегмента. Пока в очереди есть записи,
+    новые ответы тоже идут в нее, чтобы сохранить порядок. Данные
+    сбрасываются на диск (fsync) не на каждой записи, а раз в
+    fsync_interval. Фоновая задача отправляет сегменты по порядку,
+    начиная со старого, и удаляет отправленные; при ошибке повторяет
+    попытку с растущей задержкой. Если очередь превышает max_bytes,
+    удаляются самые старые сегменты.
+
+    Доставка "хотя бы один раз": после перезапуска сегмент, отправленный
+    частично, отправляется заново.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[bytes], Awaitable[None]],
+        directory: str | Path,
+        segment_bytes: int,
+        max_bytes: int,
+        fsync_interval: float,
+        publish_timeout: float,
+    ) -> None:
+        self._publish = publish
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self.publish_timeout = publish_timeout
+
+        self._segments: deque[_Segment] = deque()
+        self._next_index = 0
+        self._file = None
+        self._dirty = False
+        self._pending = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        # fsync и закрытие запечатанных сегментов
+        self._sealing: set[asyncio.Task] = set()
+
+    @property
+    def pending_records(self) -> int:
+        return sum(s.records - s.sent for s in self._segments)
+
+    @property
+    def size(self) -> int:
+        return sum(s.size for s in self._segments)
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.directory.glob(f"*{_SUFFIX}")):
+            size, records = await asyncio.to_thread(_scan, path)
+            self._segments.append(_Segment(path, size, records))
+            self._next_index = int(path.stem) + 1
+        if self.pending_records:
+            logger.info(f"Spool has {self.pending_records} responses from previous run")
+            self._pending.set()
+        self._tasks = [
+            asyncio.create_task(self._drain()),
+            asyncio.create_task(self._fsync_loop()),
+        ]
+
+    async def close(self) -> None:
+        """Останавливает отправку; неотправленные ответы остаются на диске."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._seal()
+        await asyncio.gather(*self._sealing, return_exceptions=True)
+
+    async def publish(self, body: bytes) -> None:
+        """Публикует ответ, а если это не удалось - сохраняет его в очередь."""
+        if not self.pending_records:
+            try:
+                async with asyncio.timeout(self.publish_timeout):
+                    await self._publish(body)
+                return
+            except Exception as e:
+                get_metrics().publish_failures.inc()
+                logger.warning(f"Failed to publish response, spooling it: {e!r}")
+        self.append(body)
+
+    async def forward(
+        self, publish: Callable[[bytes], Awaitable[None]], body: bytes
+    ) -> None:
+        """
+        Передает ответ в publish, а пока в очереди есть записи - дописывает
+        его в очередь. Для отправки, которая сама сохраняет неотправленные
+        ответы через append, например пачками.
+        """
+        if self.pending_records:
+            self.append(body)
+        else:
+            await publish(body)
+
+    def append(self, body: bytes) -> None:
+        if self._file is None:
+            path = self.directory / f"{self._next_index:012d}{_SUFFIX}"
+            self._next_index += 1
+            self._file = open(path, "ab")
+            self._segments.append(_Segment(path))
+        segment = self._segments[-1]
+        self._file.write(_HEADER.pack(len(body)))
+        self._file.write(body)
+        segment.size += _HEADER.size + len(body)
+        segment.records += 1
+        self._dirty = True
+        if segment.size >= self.segment_bytes:
+            self._seal()
+        self._evict()
+        self._pending.set()
+
+    def _seal(self) -> None:
+        """Закрывает текущий сегмент, следующая запись начнет новый."""
+        if self._file is None:
+            return
+        file, self._file = self._file, None
+        self._dirty = False
+        # после flush записи уже можно читать из файла, а fsync идет в
+        # потоке, чтобы не останавливать event loop на сброс диска
+        file.flush()
+        task = asyncio.create_task(asyncio.to_thread(_sync_and_close, file))
+        self._sealing.add(task)
+        task.add_done_callback(self._sealing.discard)
+
+    def _evict(self) -> None:
+        while len(self._segments) > 1 and self.size > self.max_bytes:
+            segment = self._segments.popleft()
+            segment.evicted = True
+            segment.path.unlink(missing_ok=True)
+            logger.error(
+                f"Spool is over {self.max_bytes} bytes, dropped "
+                f"{segment.records - segment.sent} oldest responses"
+            )
+
+    async def _fsync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            if self._dirty and self._file is not None:
+                self._dirty = False
+                self._file.flush()
+                try:
+                    await asyncio.to_thread(os.fsync, self._file.fileno())
+                except (OSError, ValueError):
+                    # сегмент закрыли, пока шел fsync: он уже сброшен при закрытии
+                    pass
+
+    async def _drain(self) -> None:
+        delay = RETRY_DELAY_MIN
+        while True:
+            await self._pending.wait()
+            if not self._segments:
+                self._pending.clear()
+                continue
+            segment = self._segments[0]
+            if self._file is not None and segment is self._segments[-1]:
+                # отправляются только закрытые сегменты
+                self._seal()
+            records = await asyncio.to_thread(_read_records, segment.path, segment.size)
+            while segment.sent < len(records) and not segment.evicted:
+                try:
+                    async with asyncio.timeout(self.publish_timeout):
+                        await self._publish(records[segment.sent])
+                except Exception as e:
+                    get_metrics().publish_failures.inc()
+                    logger.warning(
+                        f"Spool drain failed, retrying in {delay:.0f}s: {e!r}"
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RETRY_DELAY_MAX)
+                    continue
+                delay = RETRY_DELAY_MIN
+                segment.sent += 1
+            if segment.evicted:
+                continue
+            self._segments.popleft()
+            await asyncio.to_thread(segment.path.unlink, missing_ok=True)
+            logger.info(f"Spool segment sent, {self.pending_records} responses left")
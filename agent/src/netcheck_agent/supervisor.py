@@ -0,0 +1,328 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from logging import getLogger
+from multiprocessing.connection import Connection
+from typing import Callable
+
+from netcheck_agent import event_loop
+from netcheck_agent.http.heartbeat import HeartbeatSender
+from netcheck_agent.scheduler import CheckScheduler
+from netcheck_agent.schemas import (
+    AgentLoad,
+    RegistrationResponse,
+    SubscriptionControl,
+)
+from netcheck_agent.telemetry import LoadStats, merge_loads
+
+logger = getLogger(__name__)
+
+HEALTH_INTERVAL = 5.0
+# воркер без отчетов дольше этого считается зависшим
+HEALTH_TIMEOUT = 3 * HEALTH_INTERVAL
+RESTART_DELAY_MIN = 1.0
+RESTART_DELAY_MAX = 30.0
+# воркер, проживший меньше, считается упавшим при старте
+MIN_HEALTHY_UPTIME = 10.0
+STOP_TIMEOUT = 30.0
+
+
+async def report_health(
+    conn: Connection, get_load: Callable[[], AgentLoad], load_stats: LoadStats
+) -> None:
+    """
+    Периодически сообщает супервизору, что воркер жив, его текущую
+    нагрузку и счетчики проверок с предыдущего отчета.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(HEALTH_INTERVAL)
+        lag = loop.time() - started - HEALTH_INTERVAL
+        conn.send(
+            {
+                "pid": os.getpid(),
+                "loop_lag": lag,
+                "load": get_load().model_dump(),
+                "counters": load_stats.counters(),
+            }
+        )
+
+
+class ControlRelay:
+    """
+    Рассылает управляющие сообщения подписок всем воркерам.
+
+    Сообщение из очереди получает только один воркер, поэтому он не
+    применяет его сам, а отправляет супервизору, и тот пересылает его
+    каждому воркеру, включая отправителя. Воркер применяет к своему
+    расписанию все пришедшие от супервизора сообщения.
+    """
+
+    def __init__(self, conn: Connection, scheduler: CheckScheduler) -> None:
+        self.conn = conn
+        self.scheduler = scheduler
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def apply(self, control: SubscriptionControl) -> None:
+        self.conn.send({"control": control.model_dump(mode="json")})
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.conn.fileno(), self._on_message)
+
+    async def close(self) -> None:
+        if self._loop is not None:
+            self._loop.remove_reader(self.conn.fileno())
+            self._loop = None
+
+    def _on_message(self) -> None:
+        try:
+            message = self.conn.recv()
+        except (EOFError, OSError):
+            self._loop.remove_reader(self.conn.fileno())
+            return
+        if "control" in message:
+            control = SubscriptionControl.model_validate(message["control"])
+            self.scheduler.apply(control)
+
+
+def worker_main(
+    registration_json: str, conn: Connection, index: int, processes: int
+) -> None:
+    """Точка входа процесса-воркера."""
+    from netcheck_agent.main import run_agent
+
+    register_response = RegistrationResponse.model_validate_json(registration_json)
+    event_loop.run(
+        run_agent(
+            register_response,
+            health_conn=conn,
+            worker_index=index,
+            workers=processes,
+        )
+    )
+
+
+class _Worker:
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: multiprocessing.Process | None = None
+        self.conn: Connection | None = None
+        self.started_at = 0.0
+        self.last_report = 0.0
+        self.loop_lag: float | None = None
+        self.load: AgentLoad | None = None
+        self.restart_delay = RESTART_DELAY_MIN
+        # сообщения для воркера отправляет отдельная задача, чтобы
+        # заполненный канал не блокировал event loop супервизора
+        self.outbox: asyncio.Queue | None = None
+        self.sender: asyncio.Task | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return (
+            self.process is not None
+            and self.process.is_alive()
+            and time.monotonic() - self.last_report < HEALTH_TIMEOUT
+        )
+
+
+class Supervisor:
+    """
+    Запускает N процессов-воркеров агента.
+
+    У каждого воркера свой event loop и свое подключение к RabbitMQ, все
+    читают общую очередь запросов. Регистрация и heartbeat выполняются
+    один раз в супервизоре; heartbeat отправляется, только пока жив хотя бы
+    один воркер. Управляющие сообщения подписок, полученные одним
+    воркером, супервизор пересылает всем (см. ControlRelay). Упавшие и
+    зависшие воркеры перезапускаются с растущей задержкой, если падают
+    сразу после старта.
+    """
+
+    def __init__(self, register_response: RegistrationResponse, processes: int):
+        self.register_response = register_response
+        self.processes = processes
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i) for i in range(processes)]
+        self._stopping = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # счетчики проверок всех воркеров с предыдущего heartbeat
+        self._load_stats = LoadStats()
+
+    def _start_worker(self, worker: _Worker) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(
+                self.register_response.model_dump_json(),
+                child_conn,
+                worker.index,
+                self.processes,
+            ),
+            name=f"netcheck-agent-worker-{worker.index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+
+        worker.process = process
+        worker.conn = parent_conn
+        worker.started_at = worker.last_report = time.monotonic()
+        worker.loop_lag = None
+        worker.load = None
+        worker.outbox = asyncio.Queue()
+        worker.sender = asyncio.create_task(self._send_loop(parent_conn, worker.outbox))
+        self._loop.add_reader(parent_conn.fileno(), self._on_report, worker)
+        self._loop.add_reader(process.sentinel, self._on_exit, worker)
+        logger.info(f"Worker {worker.index} started, pid {process.pid}")
+
+    def _on_report(self, worker: _Worker) -> None:
+        try:
+            report = worker.conn.recv()
+        except (EOFError, OSError):
+            self._loop.remove_reader(worker.conn.fileno())
+            return
+        worker.last_report = time.monotonic()
+        if "control" in report:
+            self._broadcast(report)
+            return
+        worker.loop_lag = report.get("loop_lag")
+        if report.get("load") is not None:
+            worker.load = AgentLoad.model_validate(report["load"])
+        if report.get("counters") is not None:
+            self._load_stats.add_counters(**report["counters"])
+
+    def _broadcast(self, message: dict) -> None:
+        for worker in self._workers:
+            if worker.outbox is not None:
+                worker.outbox.put_nowait(message)
+
+    async def _send_loop(self, conn: Connection, outbox: asyncio.Queue) -> None:
+        while True:
+            message = await outbox.get()
+            try:
+                await self._loop.run_in_executor(None, conn.send, message)
+            except OSError:
+                # воркер завершился, его перезапуск получит подписки
+                # при следующей синхронизации
+                return
+
+    def _on_exit(self, worker: _Worker) -> None:
+        process = worker.process
+        self._loop.remove_reader(process.sentinel)
+        self._loop.remove_reader(worker.conn.fileno())
+        worker.sender.cancel()
+        worker.outbox = worker.sender = None
+        worker.conn.close()
+        process.join()
+        if self._stopping:
+            return
+
+        uptime = time.monotonic() - worker.started_at
+        if uptime >= MIN_HEALTHY_UPTIME:
+            worker.restart_delay = RESTART_DELAY_MIN
+        delay = worker.restart_delay
+        worker.restart_delay = min(worker.restart_delay * 2, RESTART_DELAY_MAX)
+        logger.error(
+            f"Worker {worker.index} (pid {process.pid}) exited with code "
+            f"{process.exitcode}, restarting in {delay:.0f}s"
+        )
+        self._loop.call_later(delay, self._restart, worker)
+
+    def _restart(self, worker: _Worker) -> None:
+        if not self._stopping:
+            self._start_worker(worker)
+
+    async def _watch_health(self) -> None:
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL)
+            for worker in self._workers:
+                process = worker.process
+                if process is None or not process.is_alive():
+                    continue
+                if time.monotonic() - worker.last_report >= HEALTH_TIMEOUT:
+                    logger.error(
+                        f"Worker {worker.index} (pid {process.pid}) is not "
+                        f"responding, killing it"
+                    )
+                    process.kill()
+            healthy = self.healthy_workers
+            lags = [w.loop_lag for w in self._workers if w.loop_lag is not None]
+            logger.debug(
+                f"Workers healthy: {healthy}/{self.processes}, "
+                f"max loop lag: {max(lags, default=0):.3f}s"
+            )
+
+    @property
+    def healthy_workers(self) -> int:
+        return sum(worker.healthy for worker in self._workers)
+
+    def _load(self) -> AgentLoad:
+        load = merge_loads(
+            [w.load for w in self._workers if w.healthy and w.load is not None]
+        )
+        return self._load_stats.snapshot(load)
+
+    async def _heartbeat_loop(self, heartbeat: HeartbeatSender) -> None:
+        response = self.register_response
+        while True:
+            if self.healthy_workers:
+                try:
+                    await heartbeat.send(self._load())
+                    logger.debug("Heartbeat sent successfully")
+                except Exception as e:
+                    logger.error(f"Heartbeat failed: {e}")
+            else:
+                logger.warning("No healthy workers, heartbeat skipped")
+            await asyncio.sleep(response.heartbeat_interval_sec)
+
+    async def _stop_workers(self) -> None:
+        self._stopping = True
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for worker in self._workers:
+            process = worker.process
+            if process is None:
+                continue
+            while process.is_alive() and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            if process.is_alive():
+                logger.warning(f"Worker {worker.index} did not stop, killing it")
+                process.kill()
+                process.join()
+            if worker.sender is not None:
+                worker.sender.cancel()
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        stop_event = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self._loop.add_signal_handler(sig, stop_event.set)
+
+        heartbeat = HeartbeatSender(
+            self.register_response.heartbeat_endpoint,
+            str(self.register_response.agent_id),
+        )
+        await heartbeat.start()
+        for worker in self._workers:
+            self._start_worker(worker)
+        tasks = [
+            asyncio.create_task(self._watch_health()),
+            asyncio.create_task(self._heartbeat_loop(heartbeat)),
+        ]
+        logger.info(f"Supervisor started with {self.processes} workers")
+
+        await stop_event.wait()
+        logger.info("Shutdown signal received, stopping workers")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._stop_workers()
+        await heartbeat.close()
+        logger.info("Supervisor stopped")
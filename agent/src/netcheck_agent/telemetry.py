@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+from netcheck_agent.concurrency import open_fds
+from netcheck_agent.schemas import AgentLoad
+
+LAG_SAMPLE_INTERVAL = 1.0
+
+
+class LoadStats:
+    """
+    Счетчики нагрузки процесса агента.
+
+    Задержка event loop замеряется раз в LAG_SAMPLE_INTERVAL, в срез
+    попадает максимальная с предыдущего среза. Скорость проверок и доля
+    ошибок тоже считаются с предыдущего среза. Супервизор не выполняет
+    проверок и срезов воркеров не делает: воркеры передают ему счетчики
+    (counters), а он копит их (add_counters) до своего среза, поэтому
+    проверки между срезами не теряются.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_lag = 0.0
+        self._since = time.monotonic()
+        self._task: asyncio.Task | None = None
+
+    def check_started(self) -> None:
+        self.in_flight += 1
+
+    def check_finished(self, success: bool) -> None:
+        self.in_flight -= 1
+        self._completed += 1
+        if not success:
+            self._failed += 1
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sample_lag())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            lag = loop.time() - started - LAG_SAMPLE_INTERVAL
+            self._max_lag = max(self._max_lag, lag)
+
+    def gauges(self, queued: int = 0, spooled: int = 0) -> AgentLoad:
+        """Текущая нагрузка без скоростей."""
+        return AgentLoad(
+            in_flight=self.in_flight,
+            queued=queued,
+            spooled=spooled,
+            open_fds=open_fds(),
+        )
+
+    def counters(self) -> dict:
+        """Счетчики с предыдущего вызова; сбрасывает их."""
+        counters = {
+            "completed": self._completed,
+            "failed": self._failed,
+            "max_lag": self._max_lag,
+        }
+        self._completed = 0
+        self._failed = 0
+        self._max_lag = 0.0
+        return counters
+
+    def add_counters(self, completed: int, failed: int, max_lag: float) -> None:
+        """Добавляет счетчики другого процесса."""
+        self._completed += completed
+        self._failed += failed
+        self._max_lag = max(self._max_lag, max_lag)
+
+    def snapshot(self, load: AgentLoad) -> AgentLoad:
+        """Дополняет текущую нагрузку скоростями с предыдущего среза."""
+        now = time.monotonic()
+        elapsed = now - self._since
+        self._since = now
+        counters = self.counters()
+        completed, failed = counters["completed"], counters["failed"]
+        return load.model_copy(
+            update={
+                "loop_lag_ms": round(counters["max_lag"] * 1000, 3),
+                "checks_per_sec": round(completed / elapsed, 3) if elapsed > 0 else 0,
+                "error_rate": round(failed / completed, 4) if completed else 0,
+            }
+        )
+
+
+def merge_loads(loads: list[AgentLoad]) -> AgentLoad:
+    """Суммарная текущая нагрузка нескольких процессов агента без скоростей."""
+    fds = [load.open_fds for load in loads if load.open_fds is not None]
+    return AgentLoad(
+        in_flight=sum(load.in_flight for load in loads),
+        queued=sum(load.queued for load in loads),
+        spooled=sum(load.spooled for load in loads),
+        open_fds=sum(fds) if fds else None,
+    )
+
+
+_load_stats_instance: LoadStats | None = None
+
+
+def get_load_stats() -> LoadStats:
+    global _load_stats_instance
+    if _load_stats_instance is None:
+        _load_stats_instance = LoadStats()
+    return _load_stats_instance
@@ -0,0 +1,43 @@
+"""add traceroute request type
+
+Revision ID: 7b2d4e8f1a63
+Revises: 3c7e1a9d52b4
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2d4e8f1a63"
+down_revision: Union[str, Sequence[str], None] = "3c7e1a9d52b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TYPE requesttype ADD VALUE IF NOT EXISTS 'TRACEROUTE'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # значение из enum в PostgreSQL не удалить, поэтому тип пересоздается
+    op.execute(
+        "DELETE FROM check_responses WHERE request_id IN "
+        "(SELECT request_id FROM check_request WHERE request_type = 'TRACEROUTE')"
+    )
+    op.execute("DELETE FROM check_request WHERE request_type = 'TRACEROUTE'")
+    op.execute("ALTER TYPE requesttype RENAME TO requesttype_old")
+    op.execute(
+        "CREATE TYPE requesttype AS ENUM "
+        "('INFO', 'PING', 'HTTP', 'TCP_CONNECT', 'UDP_CONNECT', 'DNS')"
+    )
+    op.execute(
+        "ALTER TABLE check_request ALTER COLUMN request_type TYPE requesttype "
+        "USING request_type::text::requesttype"
+    )
+    op.execute("DROP TYPE requesttype_old")
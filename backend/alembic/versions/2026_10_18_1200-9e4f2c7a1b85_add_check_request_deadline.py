@@ -0,0 +1,42 @@
+"""add check request created_at and deadline
+
+Revision ID: 9e4f2c7a1b85
+Revises: 7b2d4e8f1a63
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e4f2c7a1b85"
+down_revision: Union[str, Sequence[str], None] = "7b2d4e8f1a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "check_request",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "check_request",
+        sa.Column("deadline", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("check_request", "deadline")
+    op.drop_column("check_request", "created_at")
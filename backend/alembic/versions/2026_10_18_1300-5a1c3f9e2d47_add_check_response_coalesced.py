@@ -0,0 +1,37 @@
+"""add check response coalesced flag
+
+Revision ID: 5a1c3f9e2d47
+Revises: 9e4f2c7a1b85
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a1c3f9e2d47"
+down_revision: Union[str, Sequence[str], None] = "9e4f2c7a1b85"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "check_responses",
+        sa.Column(
+            "coalesced",
+            sa.Boolean(),
+            server_default=sa.text("false"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("check_responses", "coalesced")
@@ -0,0 +1,96 @@
+"""add check subscriptions
+
+Revision ID: c83e5b1d7f92
+Revises: 5a1c3f9e2d47
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c83e5b1d7f92"
+down_revision: Union[str, Sequence[str], None] = "5a1c3f9e2d47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "check_subscriptions",
+        sa.Column(
+            "subscription_id",
+            sa.Uuid(),
+            server_default=sa.text("gen_random_uuid()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "request_type",
+            postgresql.ENUM(name="requesttype", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("host", sa.String(), nullable=False),
+        sa.Column("port", sa.Integer(), nullable=True),
+        sa.Column(
+            "options",
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default=sa.text("'{}'::jsonb"),
+            nullable=False,
+        ),
+        sa.Column("interval_sec", sa.Float(), nullable=False),
+        sa.Column(
+            "jitter_sec", sa.Float(), server_default=sa.text("0"), nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("subscription_id"),
+    )
+    op.create_table(
+        "check_subscription_results",
+        sa.Column("agent_id", sa.Uuid(), nullable=False),
+        sa.Column("request_id", sa.Uuid(), nullable=False),
+        sa.Column("subscription_id", sa.Uuid(), nullable=False),
+        sa.Column("success", sa.Boolean(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column(
+            "result", postgresql.JSONB(astext_type=sa.Text()), nullable=False
+        ),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("latency_ms", sa.Float(), nullable=False),
+        sa.Column(
+            "coalesced",
+            sa.Boolean(),
+            server_default=sa.text("false"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["subscription_id"],
+            ["check_subscriptions.subscription_id"],
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("agent_id", "request_id"),
+    )
+    op.create_index(
+        "ix_check_subscription_results_subscription",
+        "check_subscription_results",
+        ["subscription_id", "timestamp"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_check_subscription_results_subscription",
+        table_name="check_subscription_results",
+    )
+    op.drop_table("check_subscription_results")
+    op.drop_table("check_subscriptions")
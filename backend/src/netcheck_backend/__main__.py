@@ -0,0 +1,27 @@
+import importlib.util
+import logging
+
+import uvicorn
+
+from netcheck_backend.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def get_loop() -> str:
+    # uvicorn сам выбирает uvloop в режиме "auto", поэтому задаем явно
+    if not config.USE_UVLOOP:
+        return "asyncio"
+    if importlib.util.find_spec("uvloop") is None:
+        logger.warning("uvloop is not installed, using the default asyncio loop")
+        return "asyncio"
+    return "uvloop"
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "netcheck_backend.main:app",
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        loop=get_loop(),
+    )
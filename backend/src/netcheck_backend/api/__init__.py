@@ -1,5 +1,6 @@
 from .agents import router as agents_router
 from .auth import router as auth_router
 from .check import router as check_router
+from .subscription import router as subscription_router
 
-__all__ = ["auth_router", "agents_router", "check_router"]
+__all__ = ["auth_router", "agents_router", "check_router", "subscription_router"]
@@ -65,6 +65,7 @@ async def get_agent(
         agent = AgentResponse.model_validate(agent)
         agent.agent_info = await agent_cache_service.get_agent_info(agent_id)
         agent.heartbeat = await agent_cache_service.get_agent_heartbeat(agent_id)
+        agent.load = await agent_cache_service.get_agent_load(agent_id)
         return agent
     except Exception:
         raise HTTPException(
@@ -83,11 +84,13 @@ async def get_all_agents(
     for agent in agents:
         agent_info = await agent_cache_service.get_agent_info(agent.id)
         heartbeat = await agent_cache_service.get_agent_heartbeat(agent.id)
+        load = await agent_cache_service.get_agent_load(agent.id)
         responses.append(
             AgentResponse(
                 **agent.model_dump(exclude=["agent_info"]),  # type: ignore
                 agent_info=agent_info,
-                heartbeat=heartbeat
+                heartbeat=heartbeat,
+                load=load,
             )
         )
     return responses
@@ -98,7 +101,7 @@ async def agent_heartbeat(
     heartbeat: AgentHeartbeat,
     agent_cache_service: Annotated[AgentCacheService, Depends(get_agent_cache_service)],
 ):
-    await agent_cache_service.set_agent_heartbeat(heartbeat.agent_id)
+    await agent_cache_service.set_agent_heartbeat(heartbeat.agent_id, heartbeat.load)
 
 
 @router.post("/register")
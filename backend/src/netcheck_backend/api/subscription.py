@@ -0,0 +1,108 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, status
+from rmq_service import Message, ProduceService
+
+from netcheck_backend.dependencies import (
+    get_access_token_data,
+    get_check_request_produce_service,
+    get_check_subscription_service,
+)
+from netcheck_backend.schemas import (
+    CheckSubscription,
+    CheckSubscriptionBase,
+    CheckSubscriptionResponse,
+    SubscriptionControl,
+)
+from netcheck_backend.schemas.token import AccessTokenData
+from netcheck_backend.services import CheckSubscriptionService
+
+router = APIRouter(prefix="/api/v1/subscriptions", tags=["subscriptions"])
+
+
+async def publish_control(
+    produce_service: ProduceService, control: SubscriptionControl
+) -> None:
+    """Рассылает управляющее сообщение подписок всем агентам."""
+    await produce_service.setup()
+    await produce_service.produce(Message.from_json(control.model_dump(mode="json")))
+
+
+@router.post("/", response_model=CheckSubscription)
+async def create_subscription(
+    subscription: CheckSubscriptionBase,
+    produce_service: Annotated[
+        ProduceService, Depends(get_check_request_produce_service)
+    ],
+    subscription_service: Annotated[
+        CheckSubscriptionService, Depends(get_check_subscription_service)
+    ],
+    access_token_data: Annotated[AccessTokenData, Depends(get_access_token_data)],
+):
+    res = await subscription_service.create(subscription)
+    await publish_control(
+        produce_service, SubscriptionControl(action="subscribe", subscriptions=[res])
+    )
+    return res
+
+
+@router.put("/{subscription_id}", response_model=CheckSubscription)
+async def update_subscription(
+    subscription_id: UUID,
+    subscription: CheckSubscriptionBase,
+    produce_service: Annotated[
+        ProduceService, Depends(get_check_request_produce_service)
+    ],
+    subscription_service: Annotated[
+        CheckSubscriptionService, Depends(get_check_subscription_service)
+    ],
+    access_token_data: Annotated[AccessTokenData, Depends(get_access_token_data)],
+):
+    res = await subscription_service.update(subscription_id, subscription)
+    await publish_control(
+        produce_service, SubscriptionControl(action="subscribe", subscriptions=[res])
+    )
+    return res
+
+
+@router.delete("/{subscription_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_subscription(
+    subscription_id: UUID,
+    produce_service: Annotated[
+        ProduceService, Depends(get_check_request_produce_service)
+    ],
+    subscription_service: Annotated[
+        CheckSubscriptionService, Depends(get_check_subscription_service)
+    ],
+    access_token_data: Annotated[AccessTokenData, Depends(get_access_token_data)],
+):
+    await subscription_service.delete(subscription_id)
+    await publish_control(
+        produce_service,
+        SubscriptionControl(action="unsubscribe", subscription_ids=[subscription_id]),
+    )
+
+
+@router.get("/", response_model=list[CheckSubscription])
+async def get_all_subscriptions(
+    subscription_service: Annotated[
+        CheckSubscriptionService, Depends(get_check_subscription_service)
+    ],
+    access_token_data: Annotated[AccessTokenData, Depends(get_access_token_data)],
+):
+    return await subscription_service.get_all()
+
+
+@router.get("/{subscription_id}", response_model=CheckSubscriptionResponse)
+async def get_subscription(
+    subscription_id: UUID,
+    subscription_service: Annotated[
+        CheckSubscriptionService, Depends(get_check_subscription_service)
+    ],
+    access_token_data: Annotated[AccessTokenData, Depends(get_access_token_data)],
+    limit: int = 100,
+):
+    res = await subscription_service.get(subscription_id)
+    results = await subscription_service.get_results(subscription_id, limit=limit)
+    return CheckSubscriptionResponse(**res.model_dump(), results=results)
@@ -44,6 +44,12 @@ class Config(BaseSettings):
 
     AGENT_HEARTBEAT_INTERVAL_SEC: int
     AGENT_HEARTBEAT_TIMEOUT_SEC: int
+    CHECK_REQUEST_TTL_SEC: int = 60
+    SUBSCRIPTION_SYNC_INTERVAL_SEC: int = 60
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    USE_UVLOOP: bool = False
 
     allowed_origins_raw: str = Field(..., alias="ALLOWED_ORIGINS")
 
@@ -22,6 +22,7 @@ from netcheck_backend.services import (
     AgentService,
     CheckResponseService,
     CheckService,
+    CheckSubscriptionService,
     RefreshTokenService,
     UserService,
 )
@@ -79,6 +80,14 @@ def get_check_service(
     return CheckService(session_factory)
 
 
+def get_check_subscription_service(
+    session_factory: Annotated[
+        async_sessionmaker[AsyncSession], Depends(get_async_session_factory)
+    ],
+) -> CheckSubscriptionService:
+    return CheckSubscriptionService(session_factory)
+
+
 def get_token_service(
     session_factory: Annotated[
         async_sessionmaker[AsyncSession], Depends(get_async_session_factory)
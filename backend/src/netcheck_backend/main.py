@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from netcheck_backend.api import agents_router, auth_router, check_router
+from netcheck_backend.api import (
+    agents_router,
+    auth_router,
+    check_router,
+    subscription_router,
+)
 from netcheck_backend.config import config
 from netcheck_backend.exception_handler import exception_handler
 from netcheck_backend.exceptions import AppException
@@ -32,5 +37,6 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(agents_router)
 app.include_router(check_router)
+app.include_router(subscription_router)
 
 app.add_exception_handler(AppException, exception_handler)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, ForeignKey, text
+from sqlalchemy import DateTime, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -97,6 +97,13 @@ class CheckRequestOrm(Base):
     request_type: Mapped[RequestType] = mapped_column(nullable=False)
     host: Mapped[str]
     port: Mapped[int | None] = mapped_column(nullable=True)
+    options: Mapped[dict] = mapped_column(JSONB, server_default=text("'{}'::jsonb"))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=text("now()")
+    )
+    deadline: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
 
     responses: Mapped[list["CheckResponseOrm"]] = relationship(
         back_populates="request",
@@ -104,10 +111,22 @@ class CheckRequestOrm(Base):
         lazy="joined",
     )
 
-    def __init__(self, request_type: RequestType, host: str, port: int | None):
+    def __init__(
+        self,
+        request_type: RequestType,
+        host: str,
+        port: int | None,
+        options: dict | None = None,
+        created_at: datetime | None = None,
+        deadline: datetime | None = None,
+    ):
         self.request_type = request_type
         self.host = host
         self.port = port
+        self.options = options or {}
+        if created_at is not None:
+            self.created_at = created_at
+        self.deadline = deadline
 
 
 class CheckResponseOrm(Base):
@@ -121,6 +140,8 @@ class CheckResponseOrm(Base):
     result: Mapped[dict] = mapped_column(JSONB)
     timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     latency_ms: Mapped[float]
+    # агент не выполнял проверку отдельно, а взял результат одинаковой
+    coalesced: Mapped[bool] = mapped_column(server_default=text("false"))
 
     request: Mapped["CheckRequestOrm"] = relationship(back_populates="responses")
 
@@ -133,6 +154,7 @@ class CheckResponseOrm(Base):
         result: dict | None,
         timestamp: datetime,
         latency_ms: float | None,
+        coalesced: bool = False,
     ):
         self.agent_id = agent_id
         self.request_id = request_id
@@ -141,3 +163,59 @@ class CheckResponseOrm(Base):
         self.result = result if result else {}
         self.timestamp = timestamp
         self.latency_ms = latency_ms if latency_ms is not None else -1.0
+        self.coalesced = coalesced
+
+
+class CheckSubscriptionOrm(Base):
+    __tablename__ = "check_subscriptions"
+
+    subscription_id: Mapped[UUID] = mapped_column(
+        primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    request_type: Mapped[RequestType] = mapped_column(nullable=False)
+    host: Mapped[str]
+    port: Mapped[int | None] = mapped_column(nullable=True)
+    options: Mapped[dict] = mapped_column(JSONB, server_default=text("'{}'::jsonb"))
+    interval_sec: Mapped[float]
+    jitter_sec: Mapped[float] = mapped_column(server_default=text("0"))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=text("now()")
+    )
+
+    def __init__(
+        self,
+        request_type: RequestType,
+        host: str,
+        port: int | None,
+        interval_sec: float,
+        jitter_sec: float = 0,
+        options: dict | None = None,
+    ):
+        self.request_type = request_type
+        self.host = host
+        self.port = port
+        self.interval_sec = interval_sec
+        self.jitter_sec = jitter_sec
+        self.options = options or {}
+
+
+class CheckSubscriptionResultOrm(Base):
+    __tablename__ = "check_subscription_results"
+    __table_args__ = (
+        Index(
+            "ix_check_subscription_results_subscription", "subscription_id", "timestamp"
+        ),
+    )
+
+    agent_id: Mapped[UUID] = mapped_column(primary_key=True)
+    # id запуска, который агент создает для каждого выполнения подписки
+    request_id: Mapped[UUID] = mapped_column(primary_key=True)
+    subscription_id: Mapped[UUID] = mapped_column(
+        ForeignKey(CheckSubscriptionOrm.subscription_id, ondelete="CASCADE")
+    )
+    success: Mapped[bool]
+    error: Mapped[str | None] = mapped_column(nullable=True)
+    result: Mapped[dict] = mapped_column(JSONB)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    latency_ms: Mapped[float]
+    coalesced: Mapped[bool] = mapped_column(server_default=text("false"))
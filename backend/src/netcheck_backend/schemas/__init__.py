@@ -4,6 +4,7 @@ from .agent import (
     AgentHeartbeat,
     AgentInDB,
     AgentInfo,
+    AgentLoad,
     AgentRegistrationRequest,
     AgentRegistrationResponse,
     AgentResponse,
@@ -17,8 +18,14 @@ from .check import (
     CheckRequestResponse,
     CheckResponse,
     CheckResponseBase,
+    CheckResponseBatch,
     CheckResponseWithAgentInfo,
+    CheckSubscription,
+    CheckSubscriptionBase,
+    CheckSubscriptionResponse,
+    CheckSubscriptionResult,
     RequestType,
+    SubscriptionControl,
 )
 from .response import ErrorResponse
 from .token import (
@@ -54,6 +61,7 @@ __all__ = [
     "ErrorResponse",
     "AgentCreate",
     "AgentInfo",
+    "AgentLoad",
     "AgentRegistrationRequest",
     "AgentRegistrationResponse",
     "Agent",
@@ -65,7 +73,13 @@ __all__ = [
     "CheckRequestBase",
     "CheckResponse",
     "CheckResponseBase",
+    "CheckResponseBatch",
     "RequestType",
     "CheckRequestInDB",
     "CheckResponseWithAgentInfo",
+    "CheckSubscription",
+    "CheckSubscriptionBase",
+    "CheckSubscriptionResponse",
+    "CheckSubscriptionResult",
+    "SubscriptionControl",
 ]
@@ -23,6 +23,18 @@ class AgentInfo(BaseModel):
     public_ip: str
 
 
+class AgentLoad(BaseModel):
+    """Срез нагрузки агента из последнего heartbeat."""
+
+    in_flight: int = 0
+    queued: int = 0
+    spooled: int = 0
+    loop_lag_ms: float = 0
+    checks_per_sec: float = 0
+    error_rate: float = 0
+    open_fds: int | None = None
+
+
 class Agent(BaseModel):
     api_key: str | None
     id: UUID
@@ -42,6 +54,7 @@ class Agent(BaseModel):
 
 class AgentResponse(Agent):
     heartbeat: datetime | None = None
+    load: AgentLoad | None = None
 
 
 class AgentRegistrationRequest(AgentInfo):
@@ -74,3 +87,4 @@ class AgentInDB(Agent):
 
 class AgentHeartbeat(BaseModel):
     agent_id: UUID
+    load: AgentLoad | None = None
@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 from .agent import AgentInfo
 
@@ -14,12 +15,14 @@ class RequestType(str, Enum):
     TCP_CONNECT = "TCP_CONNECT"
     UDP_CONNECT = "UDP_CONNECT"
     DNS = "DNS"
+    TRACEROUTE = "TRACEROUTE"
 
 
 class CheckRequestBase(BaseModel):
     request_type: RequestType
     host: str
     port: int | None
+    options: dict = Field(default_factory=dict)
 
     @model_validator(mode="after")
     def ensure_scheme(cls, model):
@@ -34,6 +37,8 @@ class CheckRequestBase(BaseModel):
 
 class CheckRequest(CheckRequestBase):
     request_id: UUID
+    created_at: datetime | None = None
+    deadline: datetime | None = None
 
 
 class CheckRequestInDB(CheckRequest):
@@ -46,6 +51,7 @@ class CheckResponseBase(BaseModel):
     result: dict | None = None
     latency_ms: float | None = None
     timestamp: datetime
+    coalesced: bool = False
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -53,6 +59,12 @@ class CheckResponseBase(BaseModel):
 class CheckResponse(CheckResponseBase):
     request_id: UUID
     agent_id: UUID
+    # ответ на запуск подписки, а не на разовый запрос
+    subscription_id: UUID | None = None
+
+
+class CheckResponseBatch(BaseModel):
+    responses: list[CheckResponse]
 
 
 class CheckResponseWithAgentInfo(CheckResponse):
@@ -61,3 +73,37 @@ class CheckResponseWithAgentInfo(CheckResponse):
 
 class CheckRequestResponse(CheckRequest):
     responses: list[CheckResponseWithAgentInfo]
+
+
+class CheckSubscriptionBase(CheckRequestBase):
+    interval_sec: float = Field(ge=1)
+    # случайная задержка каждого запуска на агенте, от 0 до jitter_sec
+    jitter_sec: float = Field(default=0, ge=0)
+
+
+class CheckSubscription(CheckSubscriptionBase):
+    subscription_id: UUID
+    created_at: datetime | None = None
+
+
+class CheckSubscriptionResult(CheckResponseBase):
+    request_id: UUID
+    agent_id: UUID
+    subscription_id: UUID
+
+
+class CheckSubscriptionResponse(CheckSubscription):
+    results: list[CheckSubscriptionResult]
+
+
+class SubscriptionControl(BaseModel):
+    """
+    Управляющее сообщение подписок для агентов.
+
+    subscribe добавляет или обновляет подписки, unsubscribe удаляет
+    subscription_ids, sync передает полный список подписок.
+    """
+
+    action: Literal["subscribe", "unsubscribe", "sync"]
+    subscriptions: list[CheckSubscription] = Field(default_factory=list)
+    subscription_ids: list[UUID] = Field(default_factory=list)
@@ -1,5 +1,5 @@
 from .agent_service import AgentCacheService, AgentService
-from .check_service import CheckResponseService, CheckService
+from .check_service import CheckResponseService, CheckService, CheckSubscriptionService
 from .token_service import RefreshTokenService
 from .user_service import UserService
 
@@ -10,4 +10,5 @@ __all__ = [
     "AgentCacheService",
     "CheckService",
     "CheckResponseService",
+    "CheckSubscriptionService",
 ]
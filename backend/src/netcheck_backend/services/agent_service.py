@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from netcheck_backend.exceptions import AlreadyExistsError, NotFoundError
 from netcheck_backend.models import AgentOrm
-from netcheck_backend.schemas import AgentInDB, AgentInfo, AgentStatus
+from netcheck_backend.schemas import AgentInDB, AgentInfo, AgentLoad, AgentStatus
 
 
 class AgentService:
@@ -89,10 +89,16 @@ class AgentCacheService:
     def __init__(self, redis: Redis) -> None:
         self.redis = redis
 
-    async def set_agent_heartbeat(self, agent_id: UUID) -> None:
+    async def set_agent_heartbeat(
+        self, agent_id: UUID, load: AgentLoad | None = None
+    ) -> None:
         await self.redis.set(
             f"agent:{agent_id}:heartbeat", datetime.now(UTC).isoformat(), ex=120
         )
+        if load is not None:
+            await self.redis.set(
+                f"agent:{agent_id}:load", load.model_dump_json(), ex=120
+            )
 
     async def get_agent_heartbeat(self, agent_id: UUID) -> datetime | None:
         heartbeat_str = await self.redis.get(f"agent:{agent_id}:heartbeat")
@@ -100,6 +106,12 @@ class AgentCacheService:
             return None
         return datetime.fromisoformat(heartbeat_str)
 
+    async def get_agent_load(self, agent_id: UUID) -> AgentLoad | None:
+        load_str = await self.redis.get(f"agent:{agent_id}:load")
+        if load_str is None:
+            return None
+        return AgentLoad.model_validate_json(load_str)
+
     async def set_agent_info(self, agent_id: UUID, info: AgentInfo) -> None:
         await self.redis.hset(
             f"agent:{agent_id}:info",
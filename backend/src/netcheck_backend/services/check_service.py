@@ -1,15 +1,86 @@
+import math
+from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from netcheck_backend.config import config
 from netcheck_backend.exceptions import NotFoundError
-from netcheck_backend.models import CheckRequestOrm, CheckResponseOrm
+from netcheck_backend.models import (
+    CheckRequestOrm,
+    CheckResponseOrm,
+    CheckSubscriptionOrm,
+    CheckSubscriptionResultOrm,
+)
 from netcheck_backend.schemas import (
     CheckRequestBase,
     CheckRequestInDB,
     CheckResponse,
+    CheckSubscription,
+    CheckSubscriptionBase,
+    CheckSubscriptionResult,
+    RequestType,
 )
 
+# значения по умолчанию параметров проверок агента (checks/schemas.py)
+PING_DEFAULT_COUNT = 1
+PING_DEFAULT_INTERVAL = 1.0
+PING_DEFAULT_TIMEOUT = 2.0
+TCP_DEFAULT_CONCURRENCY = 50
+TCP_DEFAULT_CONNECT_TIMEOUT = 5.0
+UDP_DEFAULT_TIMEOUT = 2.0
+TRACEROUTE_DEFAULT_TIMEOUT = 2.0
+# общий таймаут HTTP запроса агента
+HTTP_TIMEOUT = 5.0
+
+
+def _tcp_duration(options: dict) -> float:
+    connect_timeout = float(options.get("connect_timeout", TCP_DEFAULT_CONNECT_TIMEOUT))
+    ports = set(options.get("ports") or [])
+    port_range = options.get("port_range")
+    if port_range:
+        start, end = port_range
+        ports.update(range(int(start), int(end) + 1))
+    if not ports:
+        return connect_timeout
+    # порты проверяются волнами по concurrency штук
+    concurrency = max(int(options.get("concurrency", TCP_DEFAULT_CONCURRENCY)), 1)
+    return math.ceil(len(ports) / concurrency) * connect_timeout
+
+
+def _check_duration(check_request: CheckRequestBase) -> float:
+    """
+    Сколько по своим параметрам может идти сама проверка в худшем случае.
+    Срок запроса продлевается на это время, иначе долгие проверки, например
+    длинная серия ping или скан портов, прерывались бы по сроку, не успев
+    завершиться.
+    """
+    options = check_request.options
+    try:
+        match check_request.request_type:
+            case RequestType.PING:
+                count = int(options.get("count", PING_DEFAULT_COUNT))
+                interval = float(options.get("interval", PING_DEFAULT_INTERVAL))
+                timeout = float(options.get("timeout", PING_DEFAULT_TIMEOUT))
+                return max(count - 1, 0) * interval + timeout
+            case RequestType.TCP_CONNECT:
+                return _tcp_duration(options)
+            case RequestType.UDP_CONNECT:
+                return float(options.get("timeout", UDP_DEFAULT_TIMEOUT))
+            case RequestType.TRACEROUTE:
+                # пробы всех TTL агент отправляет сразу, поэтому путь
+                # целиком ждет ответа не дольше одного timeout
+                return float(options.get("timeout", TRACEROUTE_DEFAULT_TIMEOUT))
+            case RequestType.HTTP:
+                return HTTP_TIMEOUT
+            case _:
+                return 0.0
+    except (TypeError, ValueError):
+        # некорректные параметры агент отклонит сам
+        return 0.0
+
 
 class CheckService:
 
@@ -17,11 +88,19 @@ class CheckService:
         self.session_factory = session_factory
 
     async def create(self, check_request: CheckRequestBase) -> CheckRequestInDB:
+        # агенты не выполняют запросы, срок которых истек, пока они стояли в очереди
+        created_at = datetime.now(UTC)
+        deadline = created_at + timedelta(
+            seconds=config.CHECK_REQUEST_TTL_SEC + _check_duration(check_request)
+        )
         async with self.session_factory() as session:
             new_check = CheckRequestOrm(
                 request_type=check_request.request_type,
                 host=check_request.host,
                 port=check_request.port,
+                options=check_request.options,
+                created_at=created_at,
+                deadline=deadline,
             )
             session.add(new_check)
             await session.commit()
@@ -40,18 +119,140 @@ class CheckResponseService:
     def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
         self.session_factory = session_factory
 
+    @staticmethod
+    def _to_orm(check_response: CheckResponse) -> CheckResponseOrm:
+        return CheckResponseOrm(
+            agent_id=check_response.agent_id,
+            request_id=check_response.request_id,
+            success=check_response.success,
+            error=check_response.error,
+            result=check_response.result,
+            timestamp=check_response.timestamp,
+            latency_ms=check_response.latency_ms,
+            coalesced=check_response.coalesced,
+        )
+
     async def create(self, check_response: CheckResponse) -> CheckResponse:
         async with self.session_factory() as session:
-            new_check = CheckResponseOrm(
-                agent_id=check_response.agent_id,
-                request_id=check_response.request_id,
-                success=check_response.success,
-                error=check_response.error,
-                result=check_response.result,
-                timestamp=check_response.timestamp,
-                latency_ms=check_response.latency_ms,
-            )
+            new_check = self._to_orm(check_response)
             session.add(new_check)
             await session.commit()
             await session.refresh(new_check)
             return CheckResponse.model_validate(new_check)
+
+    async def create_many(self, check_responses: list[CheckResponse]) -> None:
+        """Сохраняет пачку ответов в одной транзакции."""
+        async with self.session_factory() as session:
+            session.add_all([self._to_orm(i) for i in check_responses])
+            await session.commit()
+
+
+class CheckSubscriptionService:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+
+    async def create(self, subscription: CheckSubscriptionBase) -> CheckSubscription:
+        async with self.session_factory() as session:
+            new_subscription = CheckSubscriptionOrm(
+                request_type=subscription.request_type,
+                host=subscription.host,
+                port=subscription.port,
+                options=subscription.options,
+                interval_sec=subscription.interval_sec,
+                jitter_sec=subscription.jitter_sec,
+            )
+            session.add(new_subscription)
+            await session.commit()
+            await session.refresh(new_subscription)
+            return CheckSubscription.model_validate(new_subscription)
+
+    async def update(
+        self, id: UUID, subscription: CheckSubscriptionBase
+    ) -> CheckSubscription:
+        async with self.session_factory() as session:
+            result = await session.get(CheckSubscriptionOrm, id)
+            if result is None:
+                raise NotFoundError("No check subscription")
+            result.request_type = subscription.request_type
+            result.host = subscription.host
+            result.port = subscription.port
+            result.options = subscription.options
+            result.interval_sec = subscription.interval_sec
+            result.jitter_sec = subscription.jitter_sec
+            await session.commit()
+            await session.refresh(result)
+            return CheckSubscription.model_validate(result)
+
+    async def delete(self, id: UUID) -> None:
+        async with self.session_factory() as session:
+            result = await session.get(CheckSubscriptionOrm, id)
+            if result is None:
+                raise NotFoundError("No check subscription")
+            await session.delete(result)
+            await session.commit()
+
+    async def get(self, id: UUID) -> CheckSubscription:
+        async with self.session_factory() as session:
+            result = await session.get(CheckSubscriptionOrm, id)
+            if result is None:
+                raise NotFoundError("No check subscription")
+            return CheckSubscription.model_validate(result)
+
+    async def get_all(self) -> list[CheckSubscription]:
+        async with self.session_factory() as session:
+            result = await session.execute(select(CheckSubscriptionOrm))
+            return [CheckSubscription.model_validate(i) for i in result.scalars()]
+
+    async def get_results(
+        self, id: UUID, limit: int = 100
+    ) -> list[CheckSubscriptionResult]:
+        """:return: последние результаты подписки, новые первыми"""
+        async with self.session_factory() as session:
+            stmt = (
+                select(CheckSubscriptionResultOrm)
+                .where(CheckSubscriptionResultOrm.subscription_id == id)
+                .order_by(CheckSubscriptionResultOrm.timestamp.desc())
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return [CheckSubscriptionResult.model_validate(i) for i in result.scalars()]
+
+    async def create_results(self, check_responses: list[CheckResponse]) -> None:
+        """
+        Сохраняет результаты запусков подписок.
+
+        Повторно доставленные результаты пропускаются, результаты уже
+        удаленных подписок тоже.
+        """
+        async with self.session_factory() as session:
+            existing = await session.execute(
+                select(CheckSubscriptionOrm.subscription_id).where(
+                    CheckSubscriptionOrm.subscription_id.in_(
+                        {i.subscription_id for i in check_responses}
+                    )
+                )
+            )
+            subscription_ids = set(existing.scalars())
+            values = [
+                dict(
+                    agent_id=i.agent_id,
+                    request_id=i.request_id,
+                    subscription_id=i.subscription_id,
+                    success=i.success,
+                    error=i.error,
+                    result=i.result or {},
+                    timestamp=i.timestamp,
+                    latency_ms=i.latency_ms if i.latency_ms is not None else -1.0,
+                    coalesced=i.coalesced,
+                )
+                for i in check_responses
+                if i.subscription_id in subscription_ids
+            ]
+            if not values:
+                return
+            await session.execute(
+                insert(CheckSubscriptionResultOrm)
+                .values(values)
+                .on_conflict_do_nothing()
+            )
+            await session.commit()
@@ -5,14 +5,15 @@ from functools import partial
 
 import aio_pika
 from fastapi import FastAPI
+from pydantic import TypeAdapter
 from redis.asyncio import Redis
 from rmq_service import ConsumeService, QueueConfig
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from netcheck_backend.config import config
 from netcheck_backend.database import init_database
-from netcheck_backend.schemas import CheckResponse
-from netcheck_backend.services import CheckResponseService
+from netcheck_backend.schemas import CheckResponse, CheckResponseBatch
+from netcheck_backend.services import CheckResponseService, CheckSubscriptionService
 from netcheck_backend.tasks import setup_tasks
 
 logger = logging.getLogger(__name__)
@@ -32,14 +33,66 @@ def get_channel_pools():
     return connection_pool, channel_pool
 
 
-async def response_callback(check_service: CheckResponseService, data: bytes, **kwargs):
+# агент присылает либо один ответ, либо конверт с пачкой ответов
+_response_message_adapter = TypeAdapter(CheckResponseBatch | CheckResponse)
+
+
+async def _save_batch(
+    check_service: CheckResponseService, responses: list[CheckResponse]
+):
+    try:
+        await check_service.create_many(responses)
+    except Exception:
+        # один ошибочный ответ не должен терять остальные из пачки
+        logger.warning("Error saving responses batch, saving one by one", exc_info=True)
+        for response in responses:
+            try:
+                await check_service.create(response)
+            except Exception:
+                logger.error(
+                    f"Error saving response {response.request_id}", exc_info=True
+                )
+
+
+async def _save_subscription_results(
+    subscription_service: CheckSubscriptionService, results: list[CheckResponse]
+):
+    try:
+        await subscription_service.create_results(results)
+    except Exception:
+        logger.error(f"Error saving {len(results)} subscription results", exc_info=True)
+
+
+async def response_callback(
+    check_service: CheckResponseService,
+    subscription_service: CheckSubscriptionService,
+    data: bytes,
+    **kwargs,
+):
     try:
-        response = CheckResponse.model_validate_json(data)
-        await check_service.create(response)
+        message = _response_message_adapter.validate_json(data)
     except Exception:
         logger.error(
             f"Error validating failed reminder. Raw data: {data}", exc_info=True
         )
+        return
+    if isinstance(message, CheckResponseBatch):
+        responses = message.responses
+    else:
+        responses = [message]
+
+    # результаты подписок хранятся отдельно от ответов на разовые запросы
+    results = [i for i in responses if i.subscription_id is not None]
+    if results:
+        await _save_subscription_results(subscription_service, results)
+    responses = [i for i in responses if i.subscription_id is None]
+    if len(responses) > 1:
+        await _save_batch(check_service, responses)
+    elif responses:
+        try:
+            await check_service.create(responses[0])
+        except Exception:
+            logger.error(f"Error saving response. Raw data: {data}", exc_info=True)
 
 
 async def setup_consume_registered_user_task(
@@ -56,6 +109,9 @@ async def setup_consume_registered_user_task(
             partial(
                 response_callback,
                 check_service=CheckResponseService(session_factory=session_factory),
+                subscription_service=CheckSubscriptionService(
+                    session_factory=session_factory
+                ),
             )
         )
     )
@@ -73,7 +129,7 @@ async def startup_event(app: FastAPI):
         decode_responses=True,
     )
 
-    delete_expired_tokens_task_scheduler = setup_tasks(app.state.session_factory)
+    tasks_scheduler = setup_tasks(app.state.session_factory, app.state.channel_pool)
     logger.info("DB started")
 
     consume_task = await setup_consume_registered_user_task(
@@ -89,7 +145,7 @@ async def startup_event(app: FastAPI):
     except BaseException:
         pass
 
-    delete_expired_tokens_task_scheduler.shutdown()
+    tasks_scheduler.shutdown()
 
     await app.state.channel_pool.close()
     await app.state.connection_pool.close()
@@ -1,11 +1,17 @@
 import logging
 from datetime import datetime, timezone
 
+from aio_pika.pool import Pool
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from rmq_service import Message
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from netcheck_backend.config import config
+from netcheck_backend.dependencies import get_check_request_produce_service
 from netcheck_backend.models import RefreshTokensOrm
+from netcheck_backend.schemas import SubscriptionControl
+from netcheck_backend.services import CheckSubscriptionService
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +30,31 @@ async def delete_expired_tokens(session_factory: async_sessionmaker[AsyncSession
             await session.rollback()
 
 
-def setup_delete_expired_tokens_task(session_factory: async_sessionmaker):
-    scheduler = AsyncIOScheduler()
+async def sync_subscriptions(
+    session_factory: async_sessionmaker[AsyncSession], channel_pool: Pool
+):
+    """
+    Рассылает агентам полный список подписок.
+
+    Так подписки получают агенты, перезапущенные или подключенные после
+    рассылки отдельных изменений, а пропущенные изменения исправляются.
+    """
+    try:
+        subscriptions = await CheckSubscriptionService(session_factory).get_all()
+        control = SubscriptionControl(action="sync", subscriptions=subscriptions)
+        produce_service = get_check_request_produce_service(channel_pool)
+        await produce_service.setup()
+        await produce_service.produce(
+            Message.from_json(control.model_dump(mode="json"))
+        )
+        logger.debug(f"Synced {len(subscriptions)} subscriptions")
+    except Exception as e:
+        logger.error("Error syncing subscriptions", exc_info=e)
+
+
+def setup_delete_expired_tokens_task(
+    session_factory: async_sessionmaker, scheduler: AsyncIOScheduler
+):
     scheduler.add_job(
         delete_expired_tokens,
         "interval",
@@ -33,12 +62,23 @@ def setup_delete_expired_tokens_task(session_factory: async_sessionmaker):
         args=[session_factory],
         next_run_time=datetime.now(timezone.utc),
     )
-    scheduler.start()
-    return scheduler
 
 
-def setup_tasks(session_factory: async_sessionmaker):
-    delete_expired_tokens_task_scheduler = setup_delete_expired_tokens_task(
-        session_factory
+def setup_sync_subscriptions_task(
+    session_factory: async_sessionmaker, channel_pool: Pool, scheduler: AsyncIOScheduler
+):
+    scheduler.add_job(
+        sync_subscriptions,
+        "interval",
+        seconds=config.SUBSCRIPTION_SYNC_INTERVAL_SEC,
+        args=[session_factory, channel_pool],
+        next_run_time=datetime.now(timezone.utc),
     )
-    return delete_expired_tokens_task_scheduler
+
+
+def setup_tasks(session_factory: async_sessionmaker, channel_pool: Pool):
+    scheduler = AsyncIOScheduler()
+    setup_delete_expired_tokens_task(session_factory, scheduler)
+    setup_sync_subscriptions_task(session_factory, channel_pool, scheduler)
+    scheduler.start()
+    return scheduler